@@ -0,0 +1,126 @@
+"""
+Whole-exam question generation through the provider batch APIs.
+
+    python batch_question_creator.py prepare --exam exam-az-900 --format openai
+    python batch_question_creator.py submit  --exam exam-az-900 --format openai
+    python batch_question_creator.py poll    --exam exam-az-900 --format openai
+    python batch_question_creator.py merge   --exam exam-az-900 --format openai
+
+`run` does all four and re-submits failed lines up to --max-resubmits
+times. Add --local to answer from the offline stand-in (optionally
+--fixtures answers.json) instead of a real batch API.
+"""
+import argparse
+import os
+
+from creator.batch import DEFAULT_BATCH_ROOT, BatchJob, batch_client
+from creator.csv_writer import IncrementalCsvWriter, completed_urls
+
+DEFAULT_MODELS = {"openai": os.getenv("OPENAI_MODEL", "gpt-4o-mini"), "gemini": os.getenv("GEMINI_MODEL", "gemini-2.0-flash")}
+# Same temperatures as the online providers, so merged answers land under the same LLM cache keys
+DEFAULT_TEMPERATURES = {"openai": 0.7, "gemini": None}
+
+
+def load_records(urls):
+    """Fetch and parse `urls` with the question creator's pipeline; returns (url, text, discussion, images) records."""
+    from creator.page_parser import parse_page
+    from creator.pipeline import Stage, run_pipeline
+    from gemini_question_creator import download_images, fetch_page
+
+    def fetch(url):
+        response = fetch_page(url)
+        return (url, response.content, response.headers.get("Content-Type")) if response else None
+
+    def attach_images(record):
+        url, question, discussion, image_urls = record
+        question, images = download_images(question, image_urls)
+        return url, question, discussion, images
+
+    records = []
+    run_pipeline(urls, [
+        Stage("fetch", fetch, workers=8),
+        Stage("parse", parse_page, workers=2),
+        Stage("images", attach_images, workers=4),
+    ], records.append)
+    return records
+
+
+def prepare(args, directory):
+    from gemini_question_creator import get_prompt_manager, read_urls_from_json
+
+    if os.path.exists(os.path.join(directory, "manifest.json")):
+        raise SystemExit(f"[ERROR] {directory} is already prepared; submit/poll/merge it, or remove it to start over")
+    csv_path = f"Practice Questions - {args.exam}.csv"
+    done = completed_urls(csv_path)
+    pending = [url for url in read_urls_from_json(f"jsons/{args.exam}.json") if url not in done]
+    print(f"[INFO] {len(done)} URLs already in {csv_path}, {len(pending)} to render")
+
+    job = BatchJob.create(directory, args.exam, csv_path, args.format, args.model or DEFAULT_MODELS[args.format],
+                          args.template, DEFAULT_TEMPERATURES[args.format])
+    count = job.prepare(load_records(pending), get_prompt_manager())
+    print(f"[INFO] Wrote {count} requests to {os.path.join(directory, 'requests.jsonl')}")
+    return job
+
+
+def merge(job):
+    from creator.qa_store import default_store
+    from gemini_question_creator import get_prompt_manager, get_response_cache
+
+    # Recorded in the Q&A store too, so `examqa store missing` sees batch answers
+    with IncrementalCsvWriter(job.manifest["csv"]) as writer:
+        added, failed = job.merge(writer, get_response_cache(), get_prompt_manager(),
+                                  provider_name=job.manifest["format"], store=default_store())
+    print(f"[INFO] Merged {added} rows into {job.manifest['csv']}, {failed} failed")
+    return failed
+
+
+def add_arguments(parser):
+    parser.add_argument("step", choices=["prepare", "submit", "poll", "merge", "status", "run"])
+    parser.add_argument("--exam", required=True, help="Exam name, e.g. exam-az-900 (reads jsons/<exam>.json)")
+    parser.add_argument("--format", choices=["openai", "gemini"], default="openai")
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--template", default="standard")
+    parser.add_argument("--dir", default=None, help=f"Batch directory (default {DEFAULT_BATCH_ROOT}/<exam>-<format>)")
+    parser.add_argument("--local", action="store_true", help="Answer with the offline stand-in instead of the batch API")
+    parser.add_argument("--fixtures", default=None, help="JSON {custom_id: response text} for --local")
+    parser.add_argument("--fail-every", type=int, default=0, help="With --local, fail every Nth line")
+    parser.add_argument("--interval", type=float, default=30.0, help="Seconds between status checks")
+    parser.add_argument("--max-resubmits", type=int, default=2)
+
+
+def run(args):
+    directory = args.dir or os.path.join(DEFAULT_BATCH_ROOT, f"{args.exam}-{args.format}")
+    client = batch_client(args.format, args.local, args.fixtures, args.fail_every)
+
+    if args.step == "prepare":
+        prepare(args, directory)
+        return
+    if args.step == "run" and not os.path.exists(os.path.join(directory, "manifest.json")):
+        prepare(args, directory)
+    job = BatchJob(directory)
+
+    if args.step == "submit":
+        job.submit(client)
+    elif args.step == "poll":
+        job.poll(client, args.interval)
+    elif args.step == "merge":
+        merge(job)
+    elif args.step == "run":
+        for attempt in range(args.max_resubmits + 1):
+            job.submit(client)
+            job.poll(client, args.interval)
+            if not merge(job):
+                break
+            if attempt < args.max_resubmits:
+                print(f"[INFO] Re-submitting {len(job.manifest['failed'])} failed lines")
+    print(f"[INFO] {job.describe()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-API question generation")
+    add_arguments(parser)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
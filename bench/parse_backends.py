@@ -0,0 +1,89 @@
+"""
+Time `extract_exam_page` on each installed HTML parser backend against the
+original clone-and-reparse BeautifulSoup code, over the saved pages in
+bench/fixtures. Every backend's output is checked against the original
+before it is timed.
+
+    python -m bench.parse_backends --repeat 50
+"""
+import argparse
+import glob
+import os
+import time
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from creator.page_parser import available_backends, extract_exam_page
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+BASE_URL = "https://www.examtopics.com"
+
+
+def legacy_parse(html, base_url):
+    """The pre-backend parse_exam_page, with every image download treated as successful."""
+    soup = BeautifulSoup(html, "html.parser")
+    question_div = soup.find("div", class_="question-body")
+    image_urls = []
+    question_text = ""
+    if question_div:
+        cloned_div = BeautifulSoup(str(question_div), "html.parser")
+        for img in cloned_div.find_all("img"):
+            img_src = img.get("src")
+            if img_src:
+                full_img_url = urljoin(base_url, img_src)
+                image_urls.append(full_img_url)
+                img.replace_with(f"\n![Image]({full_img_url})\n")
+        for br in cloned_div.find_all("br"):
+            br.replace_with("\n")
+        question_text = cloned_div.get_text(separator="\n", strip=True)
+
+    discussion_elem = soup.select_one("div.discussion-container")
+    discussion_text = discussion_elem.get_text(separator="\n", strip=True) if discussion_elem else ""
+    return question_text, discussion_text, image_urls
+
+
+def load_fixtures():
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def time_parser(parse, pages, repeat, rounds=3):
+    """Best of `rounds`, so warm-up and GC pauses don't decide the comparison."""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for html in pages.values():
+                parse(html, BASE_URL)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML parser backends for parse_exam_page")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = load_fixtures()
+    expected = {name: legacy_parse(html, BASE_URL) for name, html in pages.items()}
+    size = sum(len(html) for html in pages.values()) / 1024
+    print(f"{len(pages)} fixture pages, {size:.0f} KB, {args.repeat} passes, best of 3")
+
+    baseline = time_parser(legacy_parse, pages, args.repeat)
+    parsed = len(pages) * args.repeat
+    print(f"{'legacy (clone)':>16}: {baseline:.2f}s → {parsed / baseline:.0f} pages/s")
+
+    for backend in available_backends():
+        for name, html in pages.items():
+            if extract_exam_page(html, BASE_URL, backend) != expected[name]:
+                raise SystemExit(f"[ERROR] {backend} output differs from the original parser on {name}")
+        elapsed = time_parser(lambda html, base_url: extract_exam_page(html, base_url, backend), pages, args.repeat)
+        print(f"{backend:>16}: {elapsed:.2f}s → {parsed / elapsed:.0f} pages/s ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Parse-stage throughput over the saved fixture pages: threads (one core,
+because of the GIL) against a process pool at 1, 2, 4... workers up to the
+CPU count, with the same pipeline the question creator uses.
+
+    python -m bench.parse_scaling --pages 600 --backend bs4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bench.parse_backends import load_fixtures
+from creator.page_parser import parse_page
+from creator.pipeline import Stage, run_pipeline
+
+
+def make_jobs(count):
+    pages = [html.encode("utf-8") for html in load_fixtures().values()]
+    return [(f"https://www.examtopics.com/discussions/bench/view/{i}-exam-bench-topic-1-question-{i}-discussion/",
+             pages[i % len(pages)], "text/html; charset=utf-8") for i in range(count)]
+
+
+def run(jobs, workers, executor=None):
+    parsed = []
+    start = time.perf_counter()
+    run_pipeline(jobs, [Stage("parse", parse_page, workers=workers, executor=executor)], parsed.append,
+                 max_pending=workers * 8)
+    return len(parsed), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse stage scaling: threads vs process pool")
+    parser.add_argument("--pages", type=int, default=600)
+    parser.add_argument("--backend", default="bs4", help="EXAMQA_HTML_PARSER for every worker")
+    parser.add_argument("--max-processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    # Inherited by the worker processes
+    os.environ["EXAMQA_HTML_PARSER"] = args.backend
+    jobs = make_jobs(args.pages)
+    print(f"{args.pages} pages, backend {args.backend}, {os.cpu_count()} CPUs")
+
+    count, elapsed = run(jobs, workers=4)
+    print(f"{'4 threads':>14}: {count} pages in {elapsed:.2f}s → {count / elapsed:.0f} pages/s")
+
+    processes = 1
+    single = None
+    while processes <= args.max_processes:
+        with ProcessPoolExecutor(processes) as executor:
+            # Fork the workers before timing
+            list(executor.map(abs, range(processes)))
+            count, elapsed = run(jobs, processes, executor)
+        single = single or elapsed
+        print(f"{f'{processes} processes':>14}: {count} pages in {elapsed:.2f}s → {count / elapsed:.0f} pages/s "
+              f"({single / elapsed:.1f}x)")
+        processes *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+How many requests the ID-space planner saves, and what it misses, against
+a full scan of the same range on the stand-in server with IDs laid out in
+vendor blocks.
+
+    python -m bench.planner_coverage --max-id 20000 --stride 25 --stride 50 --stride 100
+    python -m bench.planner_coverage --vendor databricks --vendor oracle --stray 0.02
+"""
+import argparse
+import time
+
+from bench.standin_server import VendorLayout, serve
+from scraper.concurrency import AimdController
+from scraper.discovery import discover, generate_examtopic_urls
+from scraper.planner import IdSpacePlanner, describe, extract_vendor
+
+
+def full_scan(base_url, start, end, vendors):
+    hits = []
+
+    def on_result(result):
+        if result['is_valid'] and extract_vendor(result['final_url']) in vendors:
+            hits.append(int(result['original_url'].rsplit("/", 1)[1].split("-")[0]))
+
+    discover(generate_examtopic_urls(range(start, end + 1), base_domain=base_url), on_result,
+             controller=AimdController(initial=100, maximum=300))
+    return hits
+
+
+def planned_scan(base_url, start, end, vendors, stride):
+    planner = IdSpacePlanner(start, end, vendors, stride=stride)
+    controller = AimdController(initial=100, maximum=300)
+    planner.run(lambda ids: discover(generate_examtopic_urls(ids, base_domain=base_url), planner.observe,
+                                     controller=controller))
+    return planner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ID-space planner coverage vs a full scan")
+    parser.add_argument("--max-id", type=int, default=20000, help="Highest existing discussion ID on the stand-in")
+    parser.add_argument("--beyond", type=int, default=2000, help="Scan this many IDs past --max-id too")
+    parser.add_argument("--vendor", dest="vendors", action="append", help="Target vendor (default databricks)")
+    parser.add_argument("--stride", dest="strides", type=int, action="append", help="Sparse stride (repeatable, default 50)")
+    parser.add_argument("--stray", type=float, default=0.01, help="Fraction of IDs outside their vendor's block")
+    parser.add_argument("--seed", type=int, default=0, help="Vendor layout seed")
+    parser.add_argument("--latency", type=float, default=0.005)
+    args = parser.parse_args()
+
+    vendors = set(args.vendors or ["databricks"])
+    layout = VendorLayout(args.max_id, args.seed, stray=args.stray)
+    server, base_url = serve(latency=args.latency, layout=layout, max_id=args.max_id)
+    start, end = 101, args.max_id + args.beyond
+
+    started = time.perf_counter()
+    truth = full_scan(base_url, start, end, vendors)
+    full_elapsed = time.perf_counter() - started
+    print(f"Full scan: {end - start + 1} IDs in {full_elapsed:.1f}s | {len(truth)} {'/'.join(sorted(vendors))} IDs")
+
+    for stride in args.strides or [50]:
+        started = time.perf_counter()
+        planner = planned_scan(base_url, start, end, vendors, stride)
+        elapsed = time.perf_counter() - started
+        print(f"\nStride {stride}: {elapsed:.1f}s ({elapsed / full_elapsed:.0%} of the full scan's time)")
+        print(describe(planner.report(full_scan_hits=truth)))
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
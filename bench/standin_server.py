@@ -0,0 +1,254 @@
+"""
+Local stand-in for examtopics.com and the LLM API, so discovery, parsing
+and generation can be measured offline.
+
+- /discussions/<vendor>/view/<id>-ponce redirects to the discussion page;
+  every `missing_every`-th ID is a 404, every `flaky_every`-th ID answers
+  `flaky_status` (503) the first time it is asked for, and beyond `max_rps` requests/s the
+  server answers 429 with Retry-After.
+- With a `layout`, IDs redirect to the vendor that owns their block of
+  the ID space (see VendorLayout) instead of the one in the request, and
+  IDs above `max_id` are 404s.
+- Discussion pages are the saved pages in bench/fixtures, in turn by ID,
+  with the ID stamped into the question so every page's prompt differs.
+- /assets/... serves `image_bytes` of PNG-typed filler.
+- POST /v1/chat/completions is an OpenAI-compatible endpoint that answers
+  like FakeProvider after `llm_latency` seconds; point OPENAI_BASE_URL at
+  <base_url>/v1 to use it.
+
+    python -m bench.standin_server --port 8765 --latency 0.02 --llm-latency 0.5
+"""
+import argparse
+import bisect
+import glob
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from creator.providers import FakeProvider
+
+PONCE_PATH = re.compile(r'^/discussions/([a-z0-9-]+)/view/(\d+)-ponce/?$')
+DISCUSSION_PATH = re.compile(r'^/discussions/([a-z0-9-]+)/view/(\d+)-exam-[a-z0-9-]+-discussion/?$')
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+QUESTION_MARKER = b'<p class="card-text">'
+
+
+def load_pages():
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+        with open(path, "rb") as f:
+            pages.append(f.read())
+    return pages
+
+
+class VendorLayout:
+    """
+    Synthetic map of discussion IDs to vendors, shaped like ExamTopics: a
+    vendor's questions are added in batches, so the ID space is contiguous
+    blocks of one vendor, with a `stray` fraction of IDs belonging to a
+    random other vendor.
+    """
+
+    VENDORS = (("microsoft", 40), ("amazon", 20), ("google", 12), ("cisco", 10), ("databricks", 8),
+               ("comptia", 6), ("oracle", 4))
+
+    def __init__(self, max_id, seed=0, min_block=50, max_block=2500, stray=0.01):
+        rng = random.Random(seed)
+        names, weights = zip(*self.VENDORS)
+        self.starts, self.vendors = [], []
+        start = 1
+        while start <= max_id:
+            self.starts.append(start)
+            self.vendors.append(rng.choices(names, weights)[0])
+            start += rng.randint(min_block, max_block)
+        self.names = names
+        self.seed = seed
+        self.stray = stray
+
+    def vendor(self, discussion_id):
+        # Hashing the ID (rather than drawing in sequence) keeps strays identical whatever order IDs are asked in
+        rng = random.Random(discussion_id * 1_000_003 + self.seed)
+        if rng.random() < self.stray:
+            return rng.choice(self.names)
+        return self.vendors[bisect.bisect_right(self.starts, discussion_id) - 1]
+
+
+def discussion_path(vendor, discussion_id):
+    exam = f"exam-{vendor}-{discussion_id % 7}"
+    question = discussion_id % 500 + 1
+    return f"/discussions/{vendor}/view/{discussion_id}-{exam}-topic-1-question-{question}-discussion/"
+
+
+class RateLimiter:
+    """Token bucket shared by all handler threads; refuses requests beyond `rate` per second."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class QuietThreadingHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # socketserver's default backlog of 5 drops connection bursts, adding 1s SYN-retry stalls to the tail
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # Clients closing mid-response (the HEAD→GET fallback does this on purpose) are expected
+        pass
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    missing_every = 10
+    flaky_every = 0
+    flaky_status = 503
+    reject_head = False
+    limiter = None
+    llm_latency = 0.0
+    pages = ()
+    image = b""
+    # IDs that have already had their one failure (flaky_every)
+    failed_once = None
+    layout = None
+    max_id = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=None, content_type="text/html; charset=utf-8"):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        if self.reject_head:
+            return self._send(405, headers={"Allow": "GET"})
+        return self.do_GET()
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.limiter and not self.limiter.allow():
+            return self._send(429, b"Too Many Requests", headers={"Retry-After": "1"})
+
+        match = PONCE_PATH.match(self.path)
+        if match:
+            vendor, discussion_id = match.group(1), int(match.group(2))
+            if self.missing_every and discussion_id % self.missing_every == 0:
+                return self._send(404, b"Not Found")
+            if self.max_id and discussion_id > self.max_id:
+                return self._send(404, b"Not Found")
+            if self.flaky_every and discussion_id % self.flaky_every == 0 and self._first_failure(discussion_id):
+                return self._send(self.flaky_status, b"Flaky")
+            if self.layout:
+                vendor = self.layout.vendor(discussion_id)
+            return self._send(301, headers={"Location": discussion_path(vendor, discussion_id)})
+
+        match = DISCUSSION_PATH.match(self.path)
+        if match:
+            discussion_id = int(match.group(2))
+            page = self.pages[discussion_id % len(self.pages)]
+            return self._send(200, page.replace(QUESTION_MARKER, QUESTION_MARKER + f"Case {discussion_id}. ".encode(), 1))
+
+        if self.path.startswith("/assets/"):
+            return self._send(200, self.image, content_type="image/png")
+
+        return self._send(404, b"Not Found")
+
+    def _first_failure(self, discussion_id):
+        with self.failed_once[1]:
+            if discussion_id in self.failed_once[0]:
+                return False
+            self.failed_once[0].add(discussion_id)
+            return True
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            return self._send(404, b"Not Found")
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        prompt = request.get("messages", [{}])[-1].get("content", "")
+        if self.llm_latency:
+            time.sleep(self.llm_latency)
+
+        model = request.get("model", "bench")
+        answer = FakeProvider(model=model, latency=0).respond(prompt)
+        prompt_tokens, completion_tokens = len(prompt) // 4, len(answer) // 4
+        body = json.dumps({
+            "id": f"chatcmpl-bench-{time.monotonic_ns()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }).encode()
+        return self._send(200, body, content_type="application/json")
+
+
+def serve(port=0, latency=0.0, missing_every=10, reject_head=False, max_rps=None, flaky_every=0,
+          flaky_status=503, llm_latency=0.0, image_bytes=20_000, layout=None, max_id=None):
+    """Start the stand-in on a background thread; returns (server, base_url)."""
+    handler = type("ConfiguredStandinHandler", (StandinHandler,), {
+        "latency": latency,
+        "missing_every": missing_every,
+        "flaky_every": flaky_every,
+        "flaky_status": flaky_status,
+        "reject_head": reject_head,
+        "limiter": RateLimiter(max_rps) if max_rps else None,
+        "llm_latency": llm_latency,
+        "pages": load_pages(),
+        "image": b"\x89PNG\r\n\x1a\n" + b"\0" * max(0, image_bytes - 8),
+        "failed_once": (set(), threading.Lock()),
+        "layout": layout,
+        "max_id": max_id,
+    })
+    server = QuietThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local ExamTopics redirect stand-in")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--missing-every", type=int, default=10, help="Every Nth ID returns 404")
+    parser.add_argument("--reject-head", action="store_true", help="Answer HEAD with 405 like some CDNs do")
+    parser.add_argument("--max-rps", type=float, default=None, help="Answer 429 + Retry-After beyond this many requests/s")
+    parser.add_argument("--flaky-every", type=int, default=0, help="Every Nth ID fails once before redirecting")
+    parser.add_argument("--flaky-status", type=int, default=503, help="Status of that first failure")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds the fake LLM endpoint takes per call")
+    parser.add_argument("--max-id", type=int, default=None,
+                        help="Highest existing ID; also lays the IDs out in vendor blocks (VendorLayout)")
+    parser.add_argument("--layout-seed", type=int, default=0)
+    args = parser.parse_args()
+
+    layout = VendorLayout(args.max_id, args.layout_seed) if args.max_id else None
+    server, base_url = serve(args.port, args.latency, args.missing_every, args.reject_head, args.max_rps,
+                             args.flaky_every, args.flaky_status, args.llm_latency, layout=layout, max_id=args.max_id)
+    print(f"🧪 Stand-in listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,263 @@
+"""
+Offline benchmark suite. Every scenario runs against bench/standin_server
+(ExamTopics redirects, fixture pages, images and a fake OpenAI endpoint) in
+a fresh child process, and reports URLs/s, questions/min, p50/p99 latency
+and the child's peak RSS. Results go to bench/results/<timestamp>.json and
+are compared with the previous run there.
+
+    python -m bench.suite                                # every scenario
+    python -m bench.suite discovery retry --ids 5000 --max-rps 800
+    python -m bench.suite e2e --questions 200 --llm-latency 0.5 --pack-size 4
+
+Scenarios:
+    discovery  resolve --ids ponce URLs with the AIMD controller (HEAD)
+    retry      seed the crawl state with --ids failures and re-check the due ones;
+               every 3rd ID answers 502 once, so the inline retries are exercised
+               (a transient status: a 503 would also shrink the AIMD window, and
+               how far depends on timing, which makes runs incomparable)
+    parse      parse_page over --pages fixture pages through the pipeline
+    e2e        gemini_question_creator.main over --questions discussion pages,
+               images and the fake LLM endpoint, from an empty cache
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench.standin_server import discussion_path, serve
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+SCENARIOS = ("discovery", "retry", "parse", "e2e")
+# Where each scenario's per-item latency comes from in the metrics registry
+LATENCY_STAGES = {"discovery": "resolve", "retry": "resolve", "parse": "parse", "e2e": "generate"}
+VENDOR = "bench"
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# ---- Scenarios (run in the child process) ----
+def run_discovery(args):
+    from scraper.concurrency import AimdController
+    from scraper.discovery import discover, generate_examtopic_urls_from_ranges
+
+    found = []
+    controller = AimdController(initial=50, maximum=args.max_in_flight)
+    urls = generate_examtopic_urls_from_ranges([(101, 100 + args.ids)], vendor=VENDOR, base_domain=args.base_url)
+    discover(urls, lambda result: result['is_valid'] and found.append(result['final_url']), controller=controller)
+    return {"items": args.ids, "questions": len(found), "retries": controller.retries, "window": controller.describe()}
+
+
+def run_retry(args):
+    from scraper.concurrency import AimdController
+    from scraper.crawl_state import CrawlState
+    from scraper.discovery import discover, generate_examtopic_urls
+
+    with tempfile.TemporaryDirectory() as workdir, CrawlState(os.path.join(workdir, "crawl_state.sqlite")) as state:
+        state.import_failures(generate_examtopic_urls(range(101, 101 + args.ids), VENDOR, args.base_url))
+        due = state.due_failures()
+        controller = AimdController(initial=50, maximum=args.max_in_flight)
+        discover(generate_examtopic_urls(due, VENDOR, args.base_url),
+                 lambda result: state.record(result, VENDOR if result['is_valid'] else None), controller=controller)
+        counts = state.counts()
+    return {"items": len(due), "questions": counts.get("resolved", 0), "retries": controller.retries,
+            "still_failed": counts.get("failed", 0), "window": controller.describe()}
+
+
+def run_parse(args):
+    from bench.parse_scaling import make_jobs
+    from creator.page_parser import default_backend, parse_page
+    from creator.pipeline import Stage, run_pipeline
+
+    parsed = []
+    run_pipeline(make_jobs(args.pages), [Stage("parse", parse_page, workers=2)], parsed.append)
+    return {"items": args.pages, "questions": len(parsed), "backend": default_backend()}
+
+
+def run_e2e(args):
+    exam = "exam-bench"
+    workdir = tempfile.mkdtemp(prefix="examqa-bench-")
+    os.makedirs(os.path.join(workdir, "jsons"))
+    urls = [args.base_url + discussion_path(VENDOR, i) for i in range(101, 101 + args.questions)]
+    with open(os.path.join(workdir, "jsons", f"{exam}.json"), "w") as f:
+        json.dump(urls, f)
+
+    # Empty caches and stores, and only the fake OpenAI endpoint as a provider
+    os.environ.update({
+        "EXAMQA_CACHE_DIR": os.path.join(workdir, "http_cache"),
+        "EXAMQA_LLM_CACHE": os.path.join(workdir, "llm_cache.sqlite"),
+        "EXAMQA_DEDUP_INDEX": os.path.join(workdir, "question_clusters.sqlite"),
+        "EXAMQA_STORE": os.path.join(workdir, "qa_store.sqlite"),
+        "EXAMQA_METRICS_DIR": os.path.join(workdir, "metrics"),
+        "EXAMQA_DEDUP": "1" if args.dedup else "0",
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{args.base_url}/v1",
+        "OPENAI_RPM": "1000000",
+        "OPENAI_TPM": "1000000000",
+        # Set but empty, so a developer's .env can't switch on another provider (load_dotenv never overrides)
+        "GEMINI_API_KEY": "",
+        "EXAMQA_FAKE_LLM": "",
+        "EXAMQA_OFFLINE": "",
+    })
+    os.chdir(workdir)
+    try:
+        import gemini_question_creator
+        gemini_question_creator.main(exam, pack_size=args.pack_size)
+        with open(f"Practice Questions - {exam}.csv", encoding="utf-8") as f:
+            rows = sum(1 for _ in csv.DictReader(f))
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {"items": args.questions, "questions": rows}
+
+
+RUNNERS = {"discovery": run_discovery, "retry": run_retry, "parse": run_parse, "e2e": run_e2e}
+
+
+def child(args):
+    from metrics import registry
+
+    started = time.perf_counter()
+    result = RUNNERS[args.child](args)
+    elapsed = time.perf_counter() - started
+
+    latency = registry.report()["stages"].get(LATENCY_STAGES[args.child], {}).get("latency_seconds", {})
+    result.update({
+        "elapsed_seconds": elapsed,
+        "urls_per_second": result["items"] / elapsed,
+        "questions_per_minute": result["questions"] / elapsed * 60,
+        "p50_seconds": latency.get("p50"),
+        "p99_seconds": latency.get("p99"),
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": registry.report()["stages"],
+    })
+    with open(args.out, "w") as f:
+        json.dump(result, f)
+
+
+# ---- Parent: stand-in server, child processes, report ----
+def server_options(scenario, args):
+    if scenario == "retry":
+        return {"latency": args.latency, "max_rps": args.max_rps, "flaky_every": 3, "flaky_status": 502}
+    if scenario == "e2e":
+        return {"latency": args.latency, "llm_latency": args.llm_latency}
+    return {"latency": args.latency, "max_rps": args.max_rps}
+
+
+def run_scenario(scenario, args):
+    """Serve the stand-in from this process and measure the scenario in a child, so the server's memory isn't counted."""
+    server, base_url = serve(**server_options(scenario, args)) if scenario != "parse" else (None, "")
+    out = tempfile.NamedTemporaryFile(suffix=".json", delete=False).name
+    command = [sys.executable, "-m", "bench.suite", "--child", scenario, "--out", out, "--base-url", base_url,
+               "--ids", str(args.ids), "--pages", str(args.pages), "--questions", str(args.questions),
+               "--pack-size", str(args.pack_size), "--max-in-flight", str(args.max_in_flight)]
+    if args.dedup:
+        command.append("--dedup")
+    env = {**os.environ, "PYTHONPATH": REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""),
+           "EXAMQA_LOG_LEVEL": "WARNING"}
+    try:
+        output = None if args.verbose else subprocess.DEVNULL
+        subprocess.run(command, cwd=REPO_ROOT, env=env, stdout=output, stderr=output, check=True)
+        with open(out) as f:
+            return json.load(f)
+    finally:
+        os.remove(out)
+        if server:
+            server.shutdown()
+
+
+def previous_results():
+    paths = sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json")))
+    if not paths:
+        return None, {}
+    with open(paths[-1]) as f:
+        return paths[-1], json.load(f).get("scenarios", {})
+
+
+def change(current, before, lower_is_better=False):
+    if not current or not before:
+        return ""
+    delta = (current - before) / before * 100
+    better = delta < 0 if lower_is_better else delta > 0
+    return f" ({delta:+.0f}%{'' if abs(delta) < 10 else ' ✅' if better else ' ⚠️'})"
+
+
+def describe(name, result, before):
+    def ms(value):
+        return f"{value * 1000:.1f}ms" if value is not None else "n/a"
+
+    return (
+        f"{name:>10}: {result['urls_per_second']:.1f} URLs/s{change(result['urls_per_second'], before.get('urls_per_second'))} | "
+        f"{result['questions_per_minute']:.0f} questions/min | "
+        f"p50 {ms(result['p50_seconds'])} p99 {ms(result['p99_seconds'])}"
+        f"{change(result['p99_seconds'], before.get('p99_seconds'), lower_is_better=True)} | "
+        f"peak RSS {result['peak_rss_mb']:.0f} MB{change(result['peak_rss_mb'], before.get('peak_rss_mb'), lower_is_better=True)}"
+    )
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite")
+    parser.add_argument("scenarios", nargs="*", help=f"Scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--ids", type=int, default=2000, help="Discussion IDs for discovery and retry")
+    parser.add_argument("--pages", type=int, default=300, help="Pages for the parse scenario")
+    parser.add_argument("--questions", type=int, default=100, help="Discussion pages for the e2e scenario")
+    parser.add_argument("--latency", type=float, default=0.01, help="Stand-in server latency per request (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake LLM endpoint latency per call (s)")
+    parser.add_argument("--max-rps", type=float, default=None, help="Stand-in answers 429 beyond this rate")
+    parser.add_argument("--max-in-flight", type=int, default=300, help="AIMD ceiling for discovery and retry")
+    parser.add_argument("--pack-size", type=int, default=1, help="Pages per LLM request in e2e")
+    parser.add_argument("--dedup", action="store_true", help="Turn near-duplicate reuse on in e2e")
+    parser.add_argument("--no-save", action="store_true", help="Print only; don't write bench/results")
+    parser.add_argument("--verbose", action="store_true", help="Show the children's output")
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    previous_path, previous = previous_results()
+    if previous_path:
+        print(f"Comparing with {os.path.relpath(previous_path)}")
+    results = {}
+    for scenario in args.scenarios or SCENARIOS:
+        results[scenario] = run_scenario(scenario, args)
+        print(describe(scenario, results[scenario], previous.get(scenario, {})))
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+        with open(path, "w") as f:
+            json.dump({"created_at": time.time(), "git_commit": git_commit(), "python": sys.version.split()[0],
+                       "cpus": os.cpu_count(), "options": {k: v for k, v in vars(args).items()
+                                                           if k not in ("child", "out", "base_url")},
+                       "scenarios": results}, f, indent=2)
+        print(f"Saved {os.path.relpath(path)}")
+
+
+if __name__ == "__main__":
+    main()
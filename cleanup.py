@@ -1,22 +1,95 @@
-import pandas as pd
-import re
-
-# Load your CSV
-file_path = "Practice Questions - exam-certified-data-engineer-professional.csv"
-df = pd.read_csv(file_path)
-
-# Safely add [View Question](url) at the start of the QUESTION
-def prepend_link(row):
-    question = row.get("QUESTION", "")
-    if isinstance(question, str):
-        url_match = re.search(r'(https?://[^\s]+)', question)
-        if url_match:
-            url = url_match.group(1)
-            return f"[View Question]({url})\n\n{question}"
-    return question  # Return original or empty string if invalid
-
-df['QUESTION'] = df.apply(prepend_link, axis=1)
-
-# Save it back
-df.to_csv(file_path, index=False)
-print(f"✅ Updated file: {file_path}")
+import argparse
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Every exam CSV the question creators write
+DEFAULT_PATTERN = "Practice Questions - *.csv"
+LINK_PREFIX = "[View Question]("
+URL_PATTERN = r'(https?://[^\s]+)'
+CHUNK_ROWS = 50000
+
+
+def add_links(chunk):
+    """
+    Prefix each QUESTION with "[View Question](url)" using whole-column
+    string operations. The URL column is used when present, otherwise the
+    first URL in the question text. Questions that already start with the
+    link, or that are empty, are left alone, so running this twice changes
+    nothing. Returns the number of rows updated.
+    """
+    if "QUESTION" not in chunk:
+        return 0
+    question = chunk["QUESTION"]
+    url = question.str.extract(URL_PATTERN, expand=False)
+    if "URL" in chunk:
+        url = chunk["URL"].where(chunk["URL"] != "", url)
+
+    needs_link = (question != "") & ~question.str.startswith(LINK_PREFIX) & url.notna()
+    chunk.loc[needs_link, "QUESTION"] = LINK_PREFIX + url[needs_link] + ")\n\n" + question[needs_link]
+    return int(needs_link.sum())
+
+
+def process_file(path, chunk_rows=CHUNK_ROWS):
+    """
+    Stream `path` through add_links() `chunk_rows` at a time into a temp
+    file next to it, then swap it in with os.replace, so a crash leaves
+    either the old file or the new one. Unchanged files are not rewritten.
+    Returns (path, rows, updated).
+    """
+    import pandas as pd
+
+    tmp_path = f"{path}.tmp"
+    rows = updated = 0
+    try:
+        # Everything as text, exactly as written: no NaN for empty cells, no "NA" → NaN
+        chunks = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+        with open(tmp_path, "w", newline="", encoding="utf-8") as out:
+            for number, chunk in enumerate(chunks):
+                updated += add_links(chunk)
+                rows += len(chunk)
+                chunk.to_csv(out, index=False, header=number == 0)
+            out.flush()
+            os.fsync(out.fileno())
+        if updated:
+            os.replace(tmp_path, path)
+    except pd.errors.EmptyDataError:
+        pass
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path, rows, updated
+
+
+def add_arguments(parser):
+    parser.add_argument("files", nargs="*", help=f"CSV files to update (default: every '{DEFAULT_PATTERN}')")
+    parser.add_argument("--workers", type=int, default=None, help="Files processed in parallel (default: CPU count)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Rows read and written per chunk")
+
+
+def main(paths=None, workers=None, chunk_rows=CHUNK_ROWS):
+    paths = paths or sorted(glob.glob(DEFAULT_PATTERN))
+    if not paths:
+        print(f"No files matching '{DEFAULT_PATTERN}'")
+        return
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+
+    if workers == 1:
+        results = [process_file(path, chunk_rows) for path in paths]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(process_file, paths, [chunk_rows] * len(paths)))
+
+    for path, rows, updated in results:
+        print(f"✅ Updated file: {path} ({updated}/{rows} rows)" if updated else f"✔️ Already up to date: {path} ({rows} rows)")
+
+
+def run(args):
+    main(args.files, args.workers, args.chunk_rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prefix questions with their [View Question] link")
+    add_arguments(parser)
+    run(parser.parse_args(sys.argv[1:]))
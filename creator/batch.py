@@ -0,0 +1,394 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+from creator import generation
+from creator.compaction import compact_for_template
+from creator.providers import FakeProvider
+
+DEFAULT_BATCH_ROOT = "batches"
+FORMATS = ("openai", "gemini")
+MANIFEST = "manifest.json"
+REQUESTS = "requests.jsonl"
+
+
+def custom_id_for(url):
+    """Discussion ID when the URL has one, else a short hash; either way stable across runs."""
+    match = re.search(r'/view/(\d+)-', url)
+    return f"q-{match.group(1)}" if match else "u-" + hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+
+def request_line(fmt, custom_id, model, prompt, temperature=None):
+    """One request in the OpenAI Batch or Gemini batch JSONL input format."""
+    if fmt == "openai":
+        body = {"model": model, "messages": [{"role": "user", "content": prompt}]}
+        if temperature is not None:
+            body["temperature"] = temperature
+        return {"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}
+    if fmt == "gemini":
+        request = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+        if temperature is not None:
+            request["generation_config"] = {"temperature": temperature}
+        return {"key": custom_id, "request": request}
+    raise ValueError(f"Unknown batch format {fmt!r}; expected one of {', '.join(FORMATS)}")
+
+
+def request_prompt(fmt, line):
+    if fmt == "openai":
+        return line["custom_id"], line["body"]["messages"][0]["content"]
+    return line["key"], line["request"]["contents"][0]["parts"][0]["text"]
+
+
+def response_line(fmt, custom_id, text=None, error=None):
+    """A result line as the provider writes it; used by the local stand-in."""
+    if fmt == "openai":
+        if error:
+            return {"custom_id": custom_id, "response": None, "error": {"code": "server_error", "message": error}}
+        body = {"choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}]}
+        return {"custom_id": custom_id, "response": {"status_code": 200, "body": body}, "error": None}
+    if error:
+        return {"key": custom_id, "status": {"code": 13, "message": error}}
+    return {"key": custom_id, "response": {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}}
+
+
+def parse_response_line(fmt, line):
+    """(custom_id, text, error) from one line of a provider's batch output."""
+    if fmt == "openai":
+        custom_id = line.get("custom_id")
+        response = line.get("response") or {}
+        if line.get("error") or response.get("status_code") != 200:
+            error = line.get("error") or response.get("body", {}).get("error") or f"HTTP {response.get('status_code')}"
+            return custom_id, None, json.dumps(error) if not isinstance(error, str) else error
+        return custom_id, response["body"]["choices"][0]["message"]["content"], None
+
+    custom_id = line.get("key")
+    if "response" not in line:
+        return custom_id, None, json.dumps(line.get("status") or line.get("error") or "no response")
+    try:
+        parts = line["response"]["candidates"][0]["content"]["parts"]
+    except (KeyError, IndexError):
+        return custom_id, None, "empty response (blocked or no candidates)"
+    return custom_id, "".join(part.get("text", "") for part in parts), None
+
+
+def _read_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _write_jsonl(path, lines):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+
+
+class OpenAIBatchClient:
+    """Uploads the JSONL and runs it through the OpenAI Batch API (24h completion window)."""
+
+    name = "openai"
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import openai
+            self._client = openai.OpenAI(api_key=self.api_key or os.getenv("OPENAI_API_KEY"))
+        return self._client
+
+    def submit(self, input_path, model):
+        with open(input_path, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(input_file_id=uploaded.id, endpoint="/v1/chat/completions",
+                                           completion_window="24h")
+        return batch.id
+
+    def status(self, remote_id):
+        batch = self.client.batches.retrieve(remote_id)
+        if batch.status == "completed":
+            return "completed"
+        if batch.status in ("failed", "expired", "cancelled"):
+            # Expired and cancelled batches still have output for the lines that finished
+            return "completed" if batch.output_file_id or batch.error_file_id else "failed"
+        return "running"
+
+    def download(self, remote_id, output_path):
+        batch = self.client.batches.retrieve(remote_id)
+        with open(output_path, "w", encoding="utf-8") as f:
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    f.write(self.client.files.content(file_id).text)
+
+
+class GeminiBatchClient:
+    """Uploads the JSONL and runs it as a Gemini API batch job."""
+
+    name = "gemini"
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client(api_key=self.api_key or os.getenv("GEMINI_API_KEY"))
+        return self._client
+
+    def submit(self, input_path, model):
+        from google.genai import types
+        uploaded = self.client.files.upload(
+            file=input_path, config=types.UploadFileConfig(display_name=os.path.basename(input_path), mime_type="jsonl"),
+        )
+        job = self.client.batches.create(model=model, src=uploaded.name,
+                                         config={"display_name": os.path.basename(os.path.dirname(input_path))})
+        return job.name
+
+    def status(self, remote_id):
+        state = self.client.batches.get(name=remote_id).state.name
+        if state == "JOB_STATE_SUCCEEDED":
+            return "completed"
+        if state in ("JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"):
+            return "failed"
+        return "running"
+
+    def download(self, remote_id, output_path):
+        job = self.client.batches.get(name=remote_id)
+        content = self.client.files.download(file=job.dest.file_name)
+        with open(output_path, "wb") as f:
+            f.write(content)
+
+
+class LocalBatchClient:
+    """
+    Offline stand-in for either batch API. Each line is answered from
+    `fixtures` ({custom_id: response text}) when present, otherwise by a
+    FakeProvider; every `fail_every`-th line comes back as an error so
+    re-submission can be exercised. The job ID is the input file's path, so
+    a later `poll` in another process can still answer it.
+    """
+
+    name = "local"
+
+    def __init__(self, fmt, fixtures=None, provider=None, fail_every=0):
+        self.fmt = fmt
+        self.fixtures = fixtures or {}
+        self.provider = provider or FakeProvider(latency=0.0)
+        self.fail_every = fail_every
+
+    def submit(self, input_path, model):
+        return f"local:{os.path.abspath(input_path)}"
+
+    def status(self, remote_id):
+        return "completed" if os.path.exists(remote_id.split(":", 1)[1]) else "failed"
+
+    def download(self, remote_id, output_path):
+        lines = []
+        for position, line in enumerate(_read_jsonl(remote_id.split(":", 1)[1]), start=1):
+            custom_id, prompt = request_prompt(self.fmt, line)
+            if self.fail_every and position % self.fail_every == 0:
+                lines.append(response_line(self.fmt, custom_id, error="simulated failure"))
+            else:
+                text = self.fixtures.get(custom_id) or self.provider.respond(prompt)
+                lines.append(response_line(self.fmt, custom_id, text))
+        _write_jsonl(output_path, lines)
+
+
+class BatchJob:
+    """
+    A whole-exam batch run kept in one directory.
+
+    `requests.jsonl` holds every rendered prompt; each submission writes the
+    subset still outstanding to `input-N.jsonl`, and its results land in
+    `output-N.jsonl`. `manifest.json` records the settings, custom_id → URL,
+    each submission's remote ID and status, and which lines have merged or
+    failed, so any step can be re-run after an interruption and only failed
+    lines are sent again.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+
+    @classmethod
+    def create(cls, directory, exam, csv_path, fmt, model, template_name, temperature=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown batch format {fmt!r}; expected one of {', '.join(FORMATS)}")
+        os.makedirs(directory, exist_ok=True)
+        manifest = {
+            "exam": exam, "csv": csv_path, "format": fmt, "model": model, "template": template_name,
+            "temperature": temperature, "created_at": time.time(),
+            "items": {}, "submissions": [], "merged": [], "failed": {},
+        }
+        _write_json_atomic(os.path.join(directory, MANIFEST), manifest)
+        return cls(directory)
+
+    def save(self):
+        _write_json_atomic(os.path.join(self.directory, MANIFEST), self.manifest)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    # ---- Steps ----
+    def prepare(self, records, prompt_manager):
+        """Render each (url, text, discussion, images) record the same way the online path does."""
+        template_name = self.manifest["template"]
+        lines = []
+        for url, text, discussion, images in records:
+            discussion = compact_for_template(prompt_manager, template_name, discussion, url)
+            _, prompt = generation.render_prompt(prompt_manager, template_name, url, text, discussion, images)
+            custom_id = custom_id_for(url)
+            self.manifest["items"][custom_id] = url
+            lines.append(request_line(self.manifest["format"], custom_id, self.manifest["model"], prompt,
+                                      self.manifest["temperature"]))
+        _write_jsonl(self._path(REQUESTS), lines)
+        self.save()
+        return len(lines)
+
+    def outstanding(self):
+        """
+        custom_ids that have not merged and are not waiting on a submission
+        that is still running or whose downloaded output has yet to be merged.
+        """
+        merged = set(self.manifest["merged"])
+        pending = {custom_id for submission in self.manifest["submissions"]
+                   if submission["status"] == "submitted"
+                   or (submission["status"] == "completed" and not submission.get("merged"))
+                   for custom_id in submission["ids"]}
+        return [custom_id for custom_id in self.manifest["items"] if custom_id not in merged and custom_id not in pending]
+
+    def submit(self, client):
+        """
+        Send every outstanding line: never submitted, or failed in an earlier
+        submission. Returns the number sent.
+        """
+        wanted = set(self.outstanding())
+        lines = [line for line in _read_jsonl(self._path(REQUESTS))
+                 if request_prompt(self.manifest["format"], line)[0] in wanted]
+        if not lines:
+            return 0
+
+        number = len(self.manifest["submissions"])
+        input_name = f"input-{number}.jsonl"
+        _write_jsonl(self._path(input_name), lines)
+        remote_id = client.submit(self._path(input_name), self.manifest["model"])
+        self.manifest["submissions"].append({
+            "number": number, "client": client.name, "remote_id": remote_id, "input": input_name,
+            "output": None, "status": "submitted", "submitted_at": time.time(),
+            "ids": [request_prompt(self.manifest["format"], line)[0] for line in lines],
+        })
+        self.save()
+        print(f"[INFO] Submitted {len(lines)} requests as {remote_id} via {client.name}")
+        return len(lines)
+
+    def poll(self, client, interval=30, timeout=None):
+        """Wait for running submissions to finish and download their output. Returns True once none are running."""
+        deadline = time.time() + timeout if timeout else None
+        while True:
+            running = [s for s in self.manifest["submissions"] if s["status"] == "submitted" and s["client"] == client.name]
+            for submission in running:
+                status = client.status(submission["remote_id"])
+                if status == "running":
+                    continue
+                if status == "completed":
+                    submission["output"] = f"output-{submission['number']}.jsonl"
+                    client.download(submission["remote_id"], self._path(submission["output"]))
+                else:
+                    # Nothing came back; every line in it goes to the failed list for re-submission
+                    for custom_id in submission["ids"]:
+                        self.manifest["failed"][custom_id] = f"batch {submission['remote_id']} {status}"
+                submission["status"] = status
+                submission["finished_at"] = time.time()
+                self.save()
+                print(f"[INFO] Batch {submission['remote_id']}: {status}")
+            if not any(s["status"] == "submitted" and s["client"] == client.name for s in self.manifest["submissions"]):
+                return True
+            if deadline and time.time() >= deadline:
+                return False
+            time.sleep(interval)
+
+    def merge(self, writer, response_cache=None, prompt_manager=None, provider_name=None, store=None):
+        """
+        Parse every downloaded output line and append the answers to the CSV,
+        keyed by URL. Lines that errored or have no QUESTION/ANSWER go to
+        the failed list. With `response_cache`, each good answer is also
+        stored under the same key the online path uses, so later
+        interactive runs reuse it; with `store` (a QAStore), each merged row
+        is recorded there as the online path does. Returns (merged, failed)
+        counts for this call.
+        """
+        fmt = self.manifest["format"]
+        merged = set(self.manifest["merged"])
+        requests_by_id = {request_prompt(fmt, line)[0]: request_prompt(fmt, line)[1]
+                          for line in _read_jsonl(self._path(REQUESTS))} if response_cache else {}
+        template_name = self.manifest["template"]
+        template = prompt_manager.get(template_name) if prompt_manager else None
+        added = failed = 0
+
+        for submission in self.manifest["submissions"]:
+            if submission["status"] != "completed" or submission.get("merged"):
+                continue
+            for line in _read_jsonl(self._path(submission["output"])):
+                custom_id, text, error = parse_response_line(fmt, line)
+                if custom_id not in self.manifest["items"] or custom_id in merged:
+                    continue
+                qa_pair = generation.parse_qa_response(text) if text is not None else None
+                if qa_pair is None:
+                    self.manifest["failed"][custom_id] = error or "[Parsing error] " + (text or "")[:200]
+                    failed += 1
+                    continue
+                url = self.manifest["items"][custom_id]
+                row = {**qa_pair, "URL": url, "TEMPLATE": template_name}
+                writer.write(row)
+                if store:
+                    store.record(url, row, template_name, f"{provider_name or fmt}:{self.manifest['model']}",
+                                 self.manifest["exam"])
+                merged.add(custom_id)
+                self.manifest["merged"].append(custom_id)
+                self.manifest["failed"].pop(custom_id, None)
+                added += 1
+                if response_cache and template and custom_id in requests_by_id:
+                    key = response_cache.key(provider_name or fmt, self.manifest["model"], template_name, template,
+                                             requests_by_id[custom_id], self.manifest["temperature"])
+                    response_cache.put(key, text, provider_name or fmt, self.manifest["model"], template_name, template)
+            # Lines the provider silently dropped are failures too
+            for custom_id in submission["ids"]:
+                if custom_id not in merged and custom_id not in self.manifest["failed"]:
+                    self.manifest["failed"][custom_id] = "missing from batch output"
+                    failed += 1
+            submission["merged"] = True
+            if store:
+                store.commit()
+            self.save()
+        return added, failed
+
+    def describe(self):
+        items = len(self.manifest["items"])
+        return (f"{self.manifest['exam']} [{self.manifest['format']}:{self.manifest['model']}] "
+                f"{len(self.manifest['merged'])}/{items} merged | {len(self.manifest['failed'])} failed | "
+                f"{len(self.manifest['submissions'])} submissions")
+
+
+def _write_json_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def batch_client(fmt, local=False, fixtures_path=None, fail_every=0):
+    if local:
+        fixtures = None
+        if fixtures_path:
+            with open(fixtures_path, "r", encoding="utf-8") as f:
+                fixtures = json.load(f)
+        return LocalBatchClient(fmt, fixtures, fail_every=fail_every)
+    return OpenAIBatchClient() if fmt == "openai" else GeminiBatchClient()
@@ -0,0 +1,170 @@
+import logging
+import re
+from collections import Counter
+
+from creator.rate_limit import estimate_tokens
+
+log = logging.getLogger(__name__)
+
+UPVOTE_LINE = re.compile(r'^upvoted (\d+) times?$', re.IGNORECASE)
+DATE_LINE = re.compile(r'^(?:\d+|an?) (?:year|month|week|day|hour|minute|second)s?(?:, \d+ \w+)? ago$', re.IGNORECASE)
+SELECTED_LINE = re.compile(r'^Selected Answer:\s*([A-Z]{0,6})$', re.IGNORECASE)
+NOISE_LINES = {
+    "highly voted", "most recent", "comments", "reply", "report", "upvote", "show answer",
+    "hide answer", "community vote distribution", "log in to examtopics", "sign in:",
+}
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+
+def split_comments(discussion):
+    """
+    Split `div.discussion-container` text into comments. Each comment ends
+    with its "upvoted N times" line; the username/badge lines before the
+    relative date are dropped and "Selected Answer: X" is lifted out.
+    """
+    comments = []
+    lines = []
+    for line in discussion.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = UPVOTE_LINE.match(line)
+        if match:
+            comments.append(_make_comment(lines, int(match.group(1))))
+            lines = []
+        else:
+            lines.append(line)
+    if lines:
+        comments.append(_make_comment(lines, 0))
+    return [comment for comment in comments if comment["text"]]
+
+
+def _make_comment(lines, votes):
+    for position, line in enumerate(lines):
+        if DATE_LINE.match(line):
+            # Everything before the date is username and badges
+            lines = lines[position + 1:]
+            break
+
+    selected = None
+    content = []
+    position = 0
+    while position < len(lines):
+        line = lines[position]
+        match = SELECTED_LINE.match(line)
+        if match:
+            selected = match.group(1).upper()
+            if not selected and position + 1 < len(lines) and re.fullmatch(r'[A-Z]{1,6}', lines[position + 1]):
+                selected = lines[position + 1]
+                position += 1
+        elif line.lower() not in NOISE_LINES:
+            content.append(line)
+        position += 1
+    return {"text": "\n".join(content), "votes": votes, "selected": selected or None}
+
+
+def _normalize(text):
+    return " ".join(re.sub(r'[^a-z0-9]+', " ", text.lower()).split())
+
+
+def _shingles(text, size=3):
+    words = text.split()
+    if len(words) < size:
+        return {text}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def deduplicate(comments, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """Fold exact and near-duplicate comments (Jaccard over word 3-grams) into the first copy, summing votes."""
+    kept = []
+    for comment in comments:
+        normalized = _normalize(comment["text"])
+        shingles = _shingles(normalized)
+        for other in kept:
+            overlap = len(shingles & other["_shingles"]) / len(shingles | other["_shingles"])
+            if normalized == other["_normalized"] or overlap >= threshold:
+                other["votes"] += comment["votes"]
+                other["duplicates"] += 1
+                break
+        else:
+            kept.append({**comment, "duplicates": 0, "_normalized": normalized, "_shingles": shingles})
+    for comment in kept:
+        del comment["_normalized"], comment["_shingles"]
+    return kept
+
+
+def vote_distribution(comments):
+    """Selected answers weighted by one plus their upvotes, most agreed first."""
+    tally = Counter()
+    for comment in comments:
+        if comment["selected"]:
+            tally[comment["selected"]] += 1 + comment["votes"]
+    return tally.most_common()
+
+
+def rank(comments):
+    """Order by upvotes, boosting comments that agree with the community's most selected answer."""
+    distribution = vote_distribution(comments)
+    consensus = distribution[0][0] if distribution else None
+
+    def score(comment):
+        agrees = consensus is not None and comment["selected"] == consensus
+        disagrees = comment["selected"] is not None and not agrees
+        return comment["votes"] * (1.5 if agrees else 0.75 if disagrees else 1.0) + (1 if agrees else 0)
+
+    return sorted(comments, key=score, reverse=True)
+
+
+def _render(comment):
+    header = f"[{comment['votes']} votes" + (f" | Selected: {comment['selected']}" if comment["selected"] else "") + "]"
+    return f"{header} {comment['text']}"
+
+
+def compact_discussion(discussion, token_budget):
+    """
+    Split, de-duplicate and rank the discussion, then keep the best comments
+    that fit in `token_budget`. Returns (compacted_text, stats).
+    """
+    before = estimate_tokens(discussion)
+    comments = split_comments(discussion)
+    stats = {"tokens_before": before, "tokens_after": before, "comments_before": len(comments), "comments_after": len(comments)}
+    if not comments or before <= token_budget:
+        return discussion, stats
+
+    ranked = rank(deduplicate(comments))
+    distribution = vote_distribution(ranked)
+    parts = []
+    if distribution:
+        parts.append("Selected answers: " + ", ".join(f"{answer} ({weight})" for answer, weight in distribution))
+    used = estimate_tokens("\n\n".join(parts))
+
+    for comment in ranked:
+        rendered = _render(comment)
+        cost = estimate_tokens(rendered)
+        if used + cost > token_budget:
+            if len(parts) <= (1 if distribution else 0):
+                # Always keep the top comment, cut to whatever budget is left
+                parts.append(rendered[:max(0, token_budget - used) * 4])
+                used = token_budget
+            # A shorter, lower-ranked comment may still fit
+            continue
+        parts.append(rendered)
+        used += cost
+
+    compacted = "\n\n".join(parts)
+    stats.update(tokens_after=estimate_tokens(compacted), comments_after=len(parts) - (1 if distribution else 0))
+    return compacted, stats
+
+
+def compact_for_template(prompt_manager, template_name, discussion, label=""):
+    """Apply the template's `discussion_token_budget` from templates.json, if it has one, and report the savings."""
+    budget = prompt_manager.token_budget(template_name)
+    if not budget or not discussion:
+        return discussion
+    compacted, stats = compact_discussion(discussion, budget)
+    if stats["tokens_after"] < stats["tokens_before"]:
+        log.info(
+            f"[INFO] Discussion {label}: {stats['tokens_before']} → {stats['tokens_after']} tokens "
+            f"({stats['comments_before']} → {stats['comments_after']} comments)"
+        )
+    return compacted
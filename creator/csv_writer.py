@@ -0,0 +1,57 @@
+import csv
+import os
+
+FIELDNAMES = ["QUESTION", "ANSWER", "URL", "TEMPLATE"]
+
+
+def completed_urls(path):
+    """URLs that already have a row in `path`; empty if the file doesn't exist yet."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        return {row["URL"] for row in csv.DictReader(f) if row.get("URL")}
+
+
+class IncrementalCsvWriter:
+    """
+    Appends one Q&A row at a time and flushes it to disk before returning,
+    so a crash loses at most the row being written and memory does not grow
+    with exam size. Reopening an existing file continues after its last row.
+    """
+
+    def __init__(self, path, fieldnames=FIELDNAMES):
+        self.path = path
+        self.fieldnames = fieldnames
+        self.rows_written = 0
+
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not is_new:
+            with open(path, "r", newline="", encoding="utf-8") as f:
+                header = next(csv.reader(f), [])
+            if "URL" not in header:
+                raise ValueError(f"{path} was written without a URL column and can't be resumed; move it aside first")
+            self.fieldnames = header
+
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction="ignore")
+        if is_new:
+            self._writer.writeheader()
+            self._flush()
+
+    def write(self, row):
+        self._writer.writerow(row)
+        self._flush()
+        self.rows_written += 1
+
+    def _flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,290 @@
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import struct
+import threading
+import time
+
+DEFAULT_INDEX_PATH = ".cache/question_clusters.sqlite"
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SIMILARITY_THRESHOLD = 0.8
+MIN_WORDS = 8
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(1729)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clusters (
+    cluster_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    leader_url TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS members (
+    url TEXT PRIMARY KEY,
+    exam TEXT,
+    cluster_id INTEGER NOT NULL,
+    signature BLOB NOT NULL,
+    tail TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    cluster_id INTEGER NOT NULL,
+    template TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    result TEXT NOT NULL,
+    updated_at REAL,
+    PRIMARY KEY (cluster_id, template, variant)
+);
+CREATE TABLE IF NOT EXISTS bands (
+    band INTEGER NOT NULL,
+    bucket TEXT NOT NULL,
+    cluster_id INTEGER NOT NULL,
+    PRIMARY KEY (band, bucket, cluster_id)
+);
+CREATE INDEX IF NOT EXISTS idx_members_cluster ON members (cluster_id);
+"""
+
+
+def normalize_question(text):
+    """Lowercased words of the question with image links, URLs and punctuation removed."""
+    text = re.sub(r'!?\[[^\]]*\]\([^)]*\)', " ", text or "")
+    text = re.sub(r'https?://\S+', " ", text)
+    return " ".join(re.sub(r'[^a-z0-9]+', " ", text.lower()).split())
+
+
+# "A." / "B)" option labels, "Solution:" and "Correct Answer:" lines, with their text on the same or the next line
+DISTINGUISHING_LINE = re.compile(r'^\s*([A-H][.)]|solution\s*:|correct answer\s*:)\s*(.*)$', re.IGNORECASE)
+
+
+def distinguishing_tail(text):
+    """
+    Hash of the lines that tell otherwise identical questions apart: the
+    options, the "Solution:" of a Yes/No series and the shown answer. A
+    question with none of them is keyed by its whole normalized text, so it
+    only ever matches an exact duplicate.
+    """
+    lines = [line.strip() for line in (text or "").split("\n") if line.strip()]
+    picked = []
+    for position, line in enumerate(lines):
+        match = DISTINGUISHING_LINE.match(line)
+        if match:
+            content = match.group(2) or (lines[position + 1] if position + 1 < len(lines) else "")
+            picked.append(normalize_question(f"{match.group(1)} {content}"))
+    key = "\n".join(picked) if picked else normalize_question(text)
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def minhash(normalized, shingle_size=3):
+    words = normalized.split()
+    shingles = {" ".join(words[i:i + shingle_size]) for i in range(max(1, len(words) - shingle_size + 1))}
+    hashes = [struct.unpack("<I", hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest())[0] for s in shingles]
+    return [min((a * h + b) % _PRIME & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def similarity(signature, other):
+    return sum(1 for x, y in zip(signature, other) if x == y) / len(signature)
+
+
+def _band_buckets(signature):
+    return [(band, hashlib.blake2b(struct.pack(f"<{ROWS}I", *signature[band * ROWS:(band + 1) * ROWS]), digest_size=8).hexdigest())
+            for band in range(BANDS)]
+
+
+class QuestionIndex:
+    """
+    Persistent MinHash/LSH index that groups near-duplicate questions.
+
+    Each URL's normalized question text gets a 64-permutation MinHash
+    signature, banded 16×4 into LSH buckets. A new question joins the
+    cluster of the first bucket-mate whose estimated Jaccard similarity is
+    at least `threshold` and whose distinguishing_tail() is identical;
+    otherwise it starts its own cluster. Clusters and their generated Q&A
+    (per template and template version) are stored in SQLite so later runs,
+    and other exams, reuse them.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, threshold=SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(members)")}
+        if "tail" not in columns:
+            # Indexes from before tails were compared: their members never match again
+            self.conn.execute("ALTER TABLE members ADD COLUMN tail TEXT")
+            self.conn.commit()
+
+    def assign(self, url, exam, question_text):
+        """Cluster `url`; returns (cluster_id, leader_url), or (None, None) if the text is too short to compare."""
+        normalized = normalize_question(question_text)
+        if len(normalized.split()) < MIN_WORDS:
+            return None, None
+
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT m.cluster_id, c.leader_url FROM members m JOIN clusters c USING (cluster_id) WHERE m.url = ?", (url,)
+            ).fetchone()
+            if row:
+                return row
+
+            signature = minhash(normalized)
+            tail = distinguishing_tail(question_text)
+            buckets = _band_buckets(signature)
+            cluster_id = self._match(signature, tail, buckets)
+            if cluster_id is None:
+                cluster_id = self.conn.execute("INSERT INTO clusters (leader_url) VALUES (?)", (url,)).lastrowid
+            self.conn.execute(
+                "INSERT INTO members (url, exam, cluster_id, signature, tail) VALUES (?, ?, ?, ?, ?)",
+                (url, exam, cluster_id, struct.pack(f"<{NUM_PERM}I", *signature), tail),
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO bands (band, bucket, cluster_id) VALUES (?, ?, ?)",
+                [(band, bucket, cluster_id) for band, bucket in buckets],
+            )
+            self.conn.commit()
+            leader = self.conn.execute("SELECT leader_url FROM clusters WHERE cluster_id = ?", (cluster_id,)).fetchone()[0]
+            return cluster_id, leader
+
+    def _match(self, signature, tail, buckets):
+        candidates = set()
+        for band, bucket in buckets:
+            candidates.update(row[0] for row in self.conn.execute(
+                "SELECT cluster_id FROM bands WHERE band = ? AND bucket = ?", (band, bucket)))
+        for cluster_id in sorted(candidates):
+            # Shared scenario text is not enough: options and "Solution:" lines must match exactly
+            for blob, in self.conn.execute("SELECT signature FROM members WHERE cluster_id = ? AND tail = ?",
+                                           (cluster_id, tail)):
+                if similarity(signature, struct.unpack(f"<{NUM_PERM}I", blob)) >= self.threshold:
+                    return cluster_id
+        return None
+
+    def result(self, cluster_id, template, variant):
+        """The cluster's Q&A made with `template` at version `variant`, or None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT result FROM results WHERE cluster_id = ? AND template = ? AND variant = ?",
+                (cluster_id, template, variant),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def store_result(self, cluster_id, qa_pair, template, variant):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results (cluster_id, template, variant, result, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (cluster_id, template, variant, json.dumps(qa_pair), time.time()),
+            )
+            self.conn.commit()
+
+    def members(self, cluster_id):
+        with self._lock:
+            return [row[0] for row in self.conn.execute("SELECT url FROM members WHERE cluster_id = ?", (cluster_id,))]
+
+
+def _is_usable(qa_pair):
+    return bool(qa_pair.get("QUESTION")) and not qa_pair.get("ANSWER", "").startswith(("[LLM error]", "[Parsing error]"))
+
+
+def _fan_out(qa_pair, leader_url, url):
+    """Copy a cluster's Q&A to another member, pointing any [View Question] links at that member."""
+    if not leader_url or leader_url == url:
+        return dict(qa_pair)
+    return {key: value.replace(leader_url, url) if isinstance(value, str) else value for key, value in qa_pair.items()}
+
+
+def template_variant(prompt_manager, template):
+    """Version of `template` as rendered: its text and its discussion budget, so editing either invalidates results."""
+    if prompt_manager is None:
+        return ""
+    payload = json.dumps([prompt_manager.fingerprint(template), prompt_manager.token_budget(template)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DedupGate:
+    """
+    Runs the LLM once per near-duplicate cluster. Items whose cluster
+    already has a result for this template version are answered from the
+    index; the first item of a cluster seen this run generates it and every
+    other member waits for that result instead of making its own call.
+    """
+
+    def __init__(self, index, template, prompt_manager=None):
+        self.index = index
+        self.template = template
+        self.prompt_manager = prompt_manager
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def run(self, items, generate_many):
+        """
+        `items` is a list of (url, exam, question_text, payload) and
+        `generate_many(payloads)` returns one Q&A dict per payload. Returns
+        one Q&A dict per item, in order.
+        """
+        results = [None] * len(items)
+        leaders = []
+        followers = []
+        # Recomputed per call: templates.json may be reloaded mid-run
+        variant = template_variant(self.prompt_manager, self.template)
+
+        for position, (url, exam, question_text, payload) in enumerate(items):
+            cluster_id, leader_url = self.index.assign(url, exam, question_text)
+            if cluster_id is None:
+                leaders.append((position, None, payload))
+                continue
+            stored = self.index.result(cluster_id, self.template, variant)
+            if stored is not None:
+                results[position] = _fan_out(stored, leader_url, url)
+                self.skipped += 1
+                continue
+            with self._lock:
+                pending = self._inflight.get(cluster_id)
+                if pending is None:
+                    self._inflight[cluster_id] = pending = {"event": threading.Event(), "result": None, "url": url}
+                    leaders.append((position, cluster_id, payload))
+                    continue
+            followers.append((position, pending))
+
+        # Generate this batch's leaders before waiting on anyone else's, so batches never wait on each other in a cycle
+        generated = []
+        try:
+            generated = generate_many([payload for _, _, payload in leaders]) if leaders else []
+        finally:
+            # Release every waiting follower, even when generation raised
+            for index, (position, cluster_id, _) in enumerate(leaders):
+                qa_pair = generated[index] if index < len(generated) else {"QUESTION": "", "ANSWER": "[LLM error]"}
+                results[position] = qa_pair
+                if cluster_id is None:
+                    continue
+                if _is_usable(qa_pair):
+                    self.index.store_result(cluster_id, qa_pair, self.template, variant)
+                with self._lock:
+                    pending = self._inflight.pop(cluster_id)
+                pending["result"] = qa_pair
+                pending["event"].set()
+
+        for position, pending in followers:
+            pending["event"].wait()
+            results[position] = _fan_out(pending["result"], pending["url"], items[position][0])
+            self.skipped += 1
+        return results
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def default_question_index():
+    global _default_index
+    if _default_index is None:
+        with _default_lock:
+            if _default_index is None:
+                _default_index = QuestionIndex(os.getenv("EXAMQA_DEDUP_INDEX", DEFAULT_INDEX_PATH))
+    return _default_index
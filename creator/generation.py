@@ -0,0 +1,68 @@
+import logging
+
+from creator.compaction import compact_for_template
+from creator.router import Router
+
+log = logging.getLogger(__name__)
+
+
+def parse_qa_response(answer):
+    """Split a 'QUESTION: ... ANSWER: ...' reply; returns None if either marker is missing."""
+    if "QUESTION:" in answer and "ANSWER:" in answer:
+        parts = answer.split("ANSWER:")
+        question = parts[0].replace("QUESTION:", "").strip()
+        return {"QUESTION": question, "ANSWER": parts[1].strip()}
+    return None
+
+
+def render_prompt(prompt_manager, template_name, url, text, discussion, images):
+    image_notes = "\n".join(f"![Image]({img.url})" for img in images)
+    template = prompt_manager.get(template_name)
+    return template, template.format(url=url, text=text, discussion=discussion, image_notes=image_notes)
+
+
+def cached_response(response_cache, router, template_name, template, prompt):
+    """Any backend's earlier answer to this exact prompt counts as a hit."""
+    return response_cache.get_any([
+        response_cache.key(provider.name, provider.model, template_name, template, prompt, provider.temperature)
+        for provider in router.providers
+    ])
+
+
+def generate_question_answer(url, text, discussion, images, backend, prompt_manager, template_name="standard", response_cache=None):
+    """
+    Render `template_name` for one page and get a QUESTION/ANSWER pair from
+    `backend` (a Router, or a single Provider). Responses are looked up in
+    and saved to `response_cache` when one is given.
+    """
+    router = backend if isinstance(backend, Router) else Router([backend])
+
+    # Pick up edits to templates.json mid-run and drop responses made with the old text
+    if prompt_manager.reload_if_changed() and response_cache:
+        response_cache.sync_templates(prompt_manager)
+    discussion = compact_for_template(prompt_manager, template_name, discussion, url)
+    template, prompt = render_prompt(prompt_manager, template_name, url, text, discussion, images)
+
+    try:
+        answer = cached_response(response_cache, router, template_name, template, prompt) if response_cache else None
+        provider = None
+        if answer is None:
+            answer, provider = router.complete(prompt)
+        # Full dumps only at DEBUG (EXAMQA_LOG_LEVEL=DEBUG or --log-level DEBUG)
+        log.debug("******** PROMPT + EXTRACTION ********\n%s", prompt)
+        log.debug("******** LLM RESPONSE ********\n%s", answer)
+
+        qa_pair = parse_qa_response(answer)
+        if qa_pair is None:
+            return {"QUESTION": prompt, "ANSWER": f"[Parsing error] Full response:\n{answer}"}
+        if provider:
+            # Not a CSV column; kept for the Q&A store
+            qa_pair["MODEL"] = provider.label
+        # Only well-formed answers are memoized; parsing errors get a fresh call next run
+        if provider and response_cache:
+            key = response_cache.key(provider.name, provider.model, template_name, template, prompt, provider.temperature)
+            response_cache.put(key, answer, provider.name, provider.model, template_name, template)
+        return qa_pair
+    except Exception as e:
+        print(f"[ERROR] LLM request failed: {e}")
+        return {"QUESTION": "", "ANSWER": "[LLM error]"}
@@ -0,0 +1,236 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_CACHE_DIR = ".cache/http"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60
+# Keep-alive connections per host, enough for the page and image fetch workers together
+DEFAULT_POOL_SIZE = 32
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    content_type TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at);
+CREATE INDEX IF NOT EXISTS idx_entries_digest ON entries (digest);
+"""
+
+
+class OfflineCacheMiss(requests.RequestException):
+    """Raised in offline mode when a URL has never been cached."""
+
+
+def decode_body(content, content_type):
+    """Decode with the Content-Type charset, falling back to UTF-8."""
+    charset = "utf-8"
+    if content_type and "charset=" in content_type:
+        charset = content_type.split("charset=")[-1].split(";")[0].strip()
+    return content.decode(charset, errors="replace")
+
+
+class CachedResponse:
+    def __init__(self, url, content, content_type, from_cache, digest=None):
+        self.url = url
+        self.content = content
+        self.headers = {"Content-Type": content_type} if content_type else {}
+        self.from_cache = from_cache
+        self.digest = digest
+
+    @property
+    def text(self):
+        return decode_body(self.content, self.headers.get("Content-Type"))
+
+
+class HttpCache:
+    """
+    Content-addressed, zlib-compressed disk cache for page HTML and images.
+
+    Bodies are stored once per SHA-256 under `blobs/`, and an SQLite index
+    maps each URL to its blob plus ETag/Last-Modified. Entries younger than
+    `max_age` are served without touching the network; older ones are
+    revalidated with a conditional GET. When the blobs exceed `max_bytes`
+    the least recently used URLs are evicted. In `offline` mode only the
+    cache is consulted and a miss raises OfflineCacheMiss.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE, offline=False, session=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.offline = offline
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=DEFAULT_POOL_SIZE, pool_maxsize=DEFAULT_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    # ---- Public API ----
+    def fetch(self, url, timeout=10):
+        entry = self._entry(url)
+
+        if entry and (self.offline or time.time() - entry["fetched_at"] < self.max_age):
+            content = self._read_blob(entry["digest"])
+            if content is not None:
+                self.hits += 1
+                self._touch(url)
+                return CachedResponse(url, content, entry["content_type"], from_cache=True, digest=entry["digest"])
+
+        if self.offline:
+            raise OfflineCacheMiss(f"Not in cache (offline mode): {url}")
+
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = self.session.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and entry:
+            content = self._read_blob(entry["digest"])
+            if content is not None:
+                self.revalidated += 1
+                self._touch(url, refreshed=True)
+                return CachedResponse(url, content, entry["content_type"], from_cache=True, digest=entry["digest"])
+            # Blob vanished underneath the index; fetch it again unconditionally
+            response = self.session.get(url, timeout=timeout)
+
+        response.raise_for_status()
+        self.misses += 1
+        digest = self._store(url, response)
+        return CachedResponse(url, response.content, response.headers.get("Content-Type"), from_cache=False, digest=digest)
+
+    def read_blob(self, digest):
+        """Body stored under `digest`, or None if it has been evicted."""
+        return self._read_blob(digest)
+
+    def stats(self):
+        return f"{self.hits} cache hits | {self.revalidated} revalidated | {self.misses} downloads"
+
+    # ---- Index ----
+    def _entry(self, url):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT digest, content_type, etag, last_modified, fetched_at FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return None
+        return dict(zip(("digest", "content_type", "etag", "last_modified", "fetched_at"), row))
+
+    def _touch(self, url, refreshed=False):
+        now = time.time()
+        with self._lock:
+            if refreshed:
+                self.conn.execute("UPDATE entries SET accessed_at = ?, fetched_at = ? WHERE url = ?", (now, now, url))
+            else:
+                self.conn.execute("UPDATE entries SET accessed_at = ? WHERE url = ?", (now, url))
+            self.conn.commit()
+
+    def _store(self, url, response):
+        digest = hashlib.sha256(response.content).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            compressed = zlib.compress(response.content, 6)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+            size = len(compressed)
+        else:
+            size = os.path.getsize(path)
+
+        now = time.time()
+        with self._lock:
+            self.conn.execute("INSERT OR IGNORE INTO blobs (digest, size) VALUES (?, ?)", (digest, size))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (url, digest, content_type, etag, last_modified, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, digest, response.headers.get("Content-Type"), response.headers.get("ETag"),
+                 response.headers.get("Last-Modified"), now, now),
+            )
+            self.conn.commit()
+        self._evict()
+        return digest
+
+    def _evict(self):
+        """Drop least recently used URLs until the blobs fit in max_bytes, then delete orphaned blobs."""
+        with self._lock:
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for url, in self.conn.execute("SELECT url FROM entries ORDER BY accessed_at").fetchall():
+                self.conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+                orphans = self.conn.execute(
+                    "SELECT digest, size FROM blobs WHERE digest NOT IN (SELECT digest FROM entries)"
+                ).fetchall()
+                for digest, size in orphans:
+                    self.conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                    try:
+                        os.remove(self._blob_path(digest))
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                if total <= self.max_bytes:
+                    break
+            self.conn.commit()
+
+    # ---- Blobs ----
+    def _blob_path(self, digest):
+        return os.path.join(self.root, "blobs", digest[:2], digest[2:])
+
+    def _read_blob(self, digest):
+        try:
+            with open(self._blob_path(digest), "rb") as f:
+                return zlib.decompress(f.read())
+        except (FileNotFoundError, zlib.error):
+            return None
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    """
+    Process-wide cache configured from the environment:
+    EXAMQA_CACHE_DIR, EXAMQA_CACHE_MAX_MB and EXAMQA_OFFLINE=1.
+    """
+    global _default_cache
+    if _default_cache is None:
+        # Pipeline workers ask for it concurrently; only one of them may build it
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = HttpCache(
+                    root=os.getenv("EXAMQA_CACHE_DIR", DEFAULT_CACHE_DIR),
+                    max_bytes=int(os.getenv("EXAMQA_CACHE_MAX_MB", DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024,
+                    offline=os.getenv("EXAMQA_OFFLINE", "") not in ("", "0", "false"),
+                )
+    return _default_cache
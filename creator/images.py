@@ -0,0 +1,112 @@
+import logging
+import mimetypes
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from creator.http_cache import default_cache
+from metrics import registry
+
+log = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 8
+
+
+class ImageRef:
+    """
+    A downloaded question image: its URL, MIME type, size and the digest of
+    its body in the HttpCache blob store. The bytes stay on disk until
+    load() is called, so only this small handle travels through the pipeline.
+    """
+
+    __slots__ = ("url", "mime_type", "size", "digest")
+
+    def __init__(self, url, mime_type, size, digest):
+        self.url = url
+        self.mime_type = mime_type
+        self.size = size
+        self.digest = digest
+
+    def load(self, cache=None):
+        cache = cache or default_cache()
+        content = cache.read_blob(self.digest) if self.digest else None
+        if content is None:
+            # Evicted since it was downloaded; fetch it again
+            content = cache.fetch(self.url).content
+        return content
+
+    def __repr__(self):
+        return f"ImageRef({self.url!r}, {self.mime_type!r}, {self.size} bytes)"
+
+
+class ImageFetcher:
+    """
+    Downloads images concurrently through the HttpCache's pooled session and
+    returns ImageRefs. Each URL is fetched at most once per run: diagrams
+    reused across questions share the first download (or its failure).
+    """
+
+    def __init__(self, cache=None, workers=DEFAULT_WORKERS, timeout=10):
+        self.cache = cache or default_cache()
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="images")
+        self.downloaded = 0
+        self.reused = 0
+        self.failed = 0
+        self.bytes = 0
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, url):
+        with self._lock:
+            future = self._futures.get(url)
+            if future is not None:
+                self.reused += 1
+                return future
+            future = self._futures[url] = self.executor.submit(self._fetch, url)
+            return future
+
+    def fetch_all(self, urls):
+        """One ImageRef per URL, in order, with None for images that could not be downloaded."""
+        futures = [self.submit(url) for url in urls]
+        return [future.result() for future in futures]
+
+    def _fetch(self, url):
+        try:
+            with registry.timer("image_fetch"):
+                response = self.cache.fetch(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            log.warning(f"Failed to fetch image: {url}\nError: {e}")
+            with self._lock:
+                self.failed += 1
+            return None
+        mime_type = response.headers.get("Content-Type") or mimetypes.guess_type(url)[0]
+        with self._lock:
+            self.downloaded += 1
+            self.bytes += len(response.content)
+        registry.add("image_fetch", bytes=len(response.content))
+        return ImageRef(url, mime_type, len(response.content), response.digest)
+
+    def stats(self):
+        return (f"{self.downloaded} images ({self.bytes / 1024:.0f} KB) | {self.reused} reused | "
+                f"{self.failed} failed")
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+_default_fetcher = None
+_default_lock = threading.Lock()
+
+
+def default_image_fetcher():
+    """Process-wide fetcher over default_cache(); EXAMQA_IMAGE_WORKERS sets its concurrency."""
+    global _default_fetcher
+    if _default_fetcher is None:
+        # One fetcher per process, or images shared between pages are downloaded once per fetcher
+        with _default_lock:
+            if _default_fetcher is None:
+                _default_fetcher = ImageFetcher(workers=int(os.getenv("EXAMQA_IMAGE_WORKERS", DEFAULT_WORKERS)))
+    return _default_fetcher
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = ".cache/llm_responses.sqlite"
+DEFAULT_MAX_ENTRIES = 50000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    template_name TEXT,
+    template_hash TEXT,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at);
+CREATE INDEX IF NOT EXISTS idx_responses_template ON responses (template_name, template_hash);
+"""
+
+
+def text_hash(text):
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent memo of LLM responses so identical requests never reach the
+    paid API twice. Keys hash (provider, model, template name + text,
+    rendered prompt, temperature); the table is capped at `max_entries`
+    with least-recently-used eviction.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    @staticmethod
+    def key(provider, model, template_name, template_text, prompt, temperature=None):
+        payload = json.dumps(
+            [provider, model, template_name, text_hash(template_text), text_hash(prompt), temperature],
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        return self.get_any([key])
+
+    def get_any(self, keys):
+        """First cached response among `keys`; the whole lookup counts as one hit or miss."""
+        with self._lock:
+            for key in keys:
+                row = self.conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self.hits += 1
+                    self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                    self.conn.commit()
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, key, response, provider, model, template_name=None, template_text=None):
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, provider, model, template_name, template_hash, response, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, model, template_name, text_hash(template_text) if template_text is not None else None,
+                 response, now, now),
+            )
+            self._evict()
+            self.conn.commit()
+
+    def sync_templates(self, prompt_manager):
+        """
+        Drop responses produced by older versions of templates the
+        PromptManager now holds. Edited templates already miss because the
+        template text is part of the key; this reclaims their space.
+        """
+        removed = 0
+        with self._lock:
+            for name, _ in prompt_manager.list():
+                cursor = self.conn.execute(
+                    "DELETE FROM responses WHERE template_name = ? AND template_hash != ?",
+                    (name, prompt_manager.fingerprint(name)),
+                )
+                removed += cursor.rowcount
+            self.conn.commit()
+        return removed
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"{self.hits} LLM cache hits | {self.misses} misses | {rate:.0%} hit rate"
+
+    def _evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def default_response_cache():
+    """Process-wide response cache configured from EXAMQA_LLM_CACHE and EXAMQA_LLM_CACHE_MAX_ENTRIES."""
+    global _default_cache
+    if _default_cache is None:
+        # Pipeline workers ask for it concurrently; only one of them may build it
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = ResponseCache(
+                    path=os.getenv("EXAMQA_LLM_CACHE", DEFAULT_CACHE_PATH),
+                    max_entries=int(os.getenv("EXAMQA_LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                )
+    return _default_cache
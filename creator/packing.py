@@ -0,0 +1,101 @@
+import logging
+import re
+
+from creator import generation
+from creator.compaction import compact_for_template
+from creator.router import Router
+
+log = logging.getLogger(__name__)
+
+ITEM_HEADER = re.compile(r'^\s*#{1,4}\s*ITEM\s+(\d+)\s*:?\s*$', re.MULTILINE)
+
+
+def render_item(number, text, discussion):
+    return f"### ITEM {number}\n\nCONTENT:\n{text}\n\nDISCUSSION:\n{discussion}\n\n---"
+
+
+def render_packed_prompt(prompt_manager, blocks, template_name="packed"):
+    template = prompt_manager.get(template_name)
+    return template, template.format(count=len(blocks), items="\n\n".join(blocks))
+
+
+def split_packed_response(answer):
+    """Map item number → parsed QUESTION/ANSWER dict for every item block that parsed cleanly."""
+    results = {}
+    headers = list(ITEM_HEADER.finditer(answer))
+    for position, header in enumerate(headers):
+        end = headers[position + 1].start() if position + 1 < len(headers) else len(answer)
+        block = answer[header.end():end].strip()
+        qa_pair = generation.parse_qa_response(block)
+        if qa_pair is not None:
+            results[int(header.group(1))] = (qa_pair, block)
+    return results
+
+
+def _item_key(response_cache, provider, template_name, template, item_text):
+    return response_cache.key(provider.name, provider.model, template_name, template, item_text, provider.temperature)
+
+
+def generate_packed(items, backend, prompt_manager, template_name="packed", response_cache=None, max_rounds=2,
+                    fallback_template="standard"):
+    """
+    Generate QUESTION/ANSWER pairs for several pages with one request.
+
+    `items` is a list of (url, text, discussion, images). All items not
+    already cached go into a single numbered prompt; the reply is split
+    back per ITEM. Items whose block is missing or unparseable are re-packed
+    on their own for up to `max_rounds` requests in total, then generated
+    one at a time with `fallback_template`. Each item's answer is cached
+    under its own rendered block, so later runs hit the cache whichever
+    items they are packed with. Returns results in `items` order, each with
+    the "TEMPLATE" that produced it.
+    """
+    router = backend if isinstance(backend, Router) else Router([backend])
+    template = prompt_manager.get(template_name)
+    # The packed template's discussion budget applies per item; the fallback compacts the original to its own
+    originals = items
+    items = [(url, text, compact_for_template(prompt_manager, template_name, discussion, url), images)
+             for url, text, discussion, images in items]
+    results = [None] * len(items)
+    item_texts = [render_item(0, text, discussion) for _, text, discussion, _ in items]
+
+    if response_cache:
+        for index, item_text in enumerate(item_texts):
+            block = response_cache.get_any([_item_key(response_cache, provider, template_name, template, item_text)
+                                            for provider in router.providers])
+            if block is not None:
+                qa_pair = generation.parse_qa_response(block)
+                results[index] = {**qa_pair, "TEMPLATE": template_name} if qa_pair else None
+
+    for _ in range(max_rounds):
+        remaining = [index for index, result in enumerate(results) if result is None]
+        if not remaining:
+            break
+        blocks = [render_item(number, items[index][1], items[index][2]) for number, index in enumerate(remaining, start=1)]
+        _, prompt = render_packed_prompt(prompt_manager, blocks, template_name)
+        try:
+            answer, provider = router.complete(prompt)
+        except Exception as e:
+            log.error(f"[ERROR] Packed LLM request failed: {e}")
+            continue
+
+        parsed = split_packed_response(answer)
+        for number, index in enumerate(remaining, start=1):
+            if number not in parsed:
+                continue
+            qa_pair, block = parsed[number]
+            results[index] = {**qa_pair, "MODEL": provider.label, "TEMPLATE": template_name}
+            if response_cache:
+                key = _item_key(response_cache, provider, template_name, template, item_texts[index])
+                response_cache.put(key, block, provider.name, provider.model, template_name, template)
+        missing = len(remaining) - sum(1 for number in range(1, len(remaining) + 1) if number in parsed)
+        log.info(f"[INFO] Packed request for {len(remaining)} pages via {provider.label}: {missing} to re-issue")
+
+    for index, result in enumerate(results):
+        if result is None:
+            url, text, discussion, images = originals[index]
+            qa_pair = generation.generate_question_answer(
+                url, text, discussion, images, router, prompt_manager, fallback_template, response_cache,
+            )
+            results[index] = {**qa_pair, "TEMPLATE": fallback_template}
+    return results
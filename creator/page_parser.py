@@ -0,0 +1,151 @@
+import os
+from urllib.parse import urljoin
+
+from creator.http_cache import decode_body
+
+QUESTION_CLASS = "question-body"
+DISCUSSION_CLASS = "discussion-container"
+# Text under these tags is not page text to BeautifulSoup's get_text(), so no backend emits it
+SKIPPED_TAGS = {"script", "style", "template", "rt", "rp"}
+BACKENDS = ("selectolax", "lxml", "bs4")
+
+
+def image_markdown(url):
+    return f"![Image]({url})"
+
+
+def _bs4_extract(html, base_url):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    question_div = soup.find("div", class_=QUESTION_CLASS)
+    image_urls = []
+    question_text = ""
+    if question_div:
+        # The soup is ours, so images are swapped for markdown in place instead of on a re-parsed copy
+        for img in question_div.find_all("img"):
+            if img.get("src"):
+                image_urls.append(urljoin(base_url, img["src"]))
+                img.replace_with(f"\n{image_markdown(image_urls[-1])}\n")
+        question_text = question_div.get_text(separator="\n", strip=True)
+
+    discussion_elem = soup.select_one(f"div.{DISCUSSION_CLASS}")
+    discussion_text = discussion_elem.get_text(separator="\n", strip=True) if discussion_elem else ""
+    return question_text, discussion_text, image_urls
+
+
+def _lxml_strings(element, base_url, image_urls):
+    if element.text:
+        yield element.text
+    for child in element:
+        # Comments and processing instructions have a non-string tag; only their tail is text
+        if isinstance(child.tag, str):
+            name = child.tag.lower()
+            if name == "img":
+                if image_urls is not None and child.get("src"):
+                    image_urls.append(urljoin(base_url, child.get("src")))
+                    yield image_markdown(image_urls[-1])
+            elif name not in SKIPPED_TAGS:
+                yield from _lxml_strings(child, base_url, image_urls)
+        if child.tail:
+            yield child.tail
+
+
+def _lxml_extract(html, base_url):
+    import lxml.html
+
+    root = lxml.html.document_fromstring(html)
+    xpath = "(//div[contains(concat(' ', normalize-space(@class), ' '), ' {} ')])[1]"
+    question = root.xpath(xpath.format(QUESTION_CLASS))
+    discussion = root.xpath(xpath.format(DISCUSSION_CLASS))
+    image_urls = []
+    question_text = _join(_lxml_strings(question[0], base_url, image_urls)) if question else ""
+    discussion_text = _join(_lxml_strings(discussion[0], base_url, None)) if discussion else ""
+    return question_text, discussion_text, image_urls
+
+
+def _selectolax_strings(node, base_url, image_urls):
+    child = node.child
+    while child is not None:
+        if child.is_text_node:
+            yield child.text_content or ""
+        elif child.is_element_node:
+            if child.tag == "img":
+                src = child.attributes.get("src")
+                if image_urls is not None and src:
+                    image_urls.append(urljoin(base_url, src))
+                    yield image_markdown(image_urls[-1])
+            elif child.tag not in SKIPPED_TAGS:
+                yield from _selectolax_strings(child, base_url, image_urls)
+        child = child.next
+
+
+def _selectolax_extract(html, base_url):
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    question = tree.css_first(f"div.{QUESTION_CLASS}")
+    discussion = tree.css_first(f"div.{DISCUSSION_CLASS}")
+    image_urls = []
+    question_text = _join(_selectolax_strings(question, base_url, image_urls)) if question else ""
+    discussion_text = _join(_selectolax_strings(discussion, base_url, None)) if discussion else ""
+    return question_text, discussion_text, image_urls
+
+
+def _join(strings):
+    """Same joining rule as get_text(separator="\\n", strip=True)."""
+    return "\n".join(stripped for stripped in (string.strip() for string in strings) if stripped)
+
+
+EXTRACTORS = {"selectolax": _selectolax_extract, "lxml": _lxml_extract, "bs4": _bs4_extract}
+
+
+def available_backends():
+    available = []
+    for name, module in (("selectolax", "selectolax.lexbor"), ("lxml", "lxml.html"), ("bs4", "bs4")):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+
+def default_backend():
+    """EXAMQA_HTML_PARSER if set, else the fastest installed backend."""
+    configured = os.getenv("EXAMQA_HTML_PARSER", "auto")
+    if configured != "auto":
+        if configured not in EXTRACTORS:
+            raise ValueError(f"Unknown HTML parser backend {configured!r}; expected one of {', '.join(BACKENDS)}")
+        return configured
+    available = available_backends()
+    if not available:
+        raise ImportError("No HTML parser installed: install selectolax, lxml or beautifulsoup4")
+    return available[0]
+
+
+def extract_exam_page(html, base_url, backend=None):
+    """
+    Pull the question and discussion text out of a discussion page.
+
+    Returns (question_text, discussion_text, image_urls). Only the
+    `div.question-body` and `div.discussion-container` subtrees are walked;
+    each `<img src>` in the question becomes an "![Image](url)" line and
+    script/style contents and comments are skipped, so every backend gives
+    the same text as BeautifulSoup's get_text(separator="\\n", strip=True).
+    The selectolax and lxml backends build the tree the way browsers do,
+    which can differ from html.parser only on badly malformed markup.
+    """
+    return EXTRACTORS[backend or default_backend()](html, base_url)
+
+
+def parse_page(job):
+    """
+    Picklable parse step for a process pool: takes (url, body_bytes,
+    content_type) from the fetch stage and returns (url, question_text,
+    discussion_text, image_urls). Only bytes and strings cross the process
+    boundary, never parser trees.
+    """
+    url, body, content_type = job
+    base_url = "/".join(url.split("/")[:3])
+    return (url, *extract_exam_page(decode_body(body, content_type), base_url))
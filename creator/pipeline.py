@@ -0,0 +1,165 @@
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import registry
+
+_STOP = object()
+
+
+class Stage:
+    """
+    One step of a pipeline. `fn` takes the previous stage's output and returns
+    this stage's output, or None to drop the item. Plain functions run on a
+    thread pool (or on `executor` when given); coroutine functions run on the
+    event loop. `workers` bounds how many items the stage handles at once.
+    With `batch_size` > 1, one collector gathers up to that many items
+    (waiting at most `batch_wait` seconds for stragglers) and hands each
+    batch to the next free worker; `fn` receives a list and returns a list
+    of outputs in the same order.
+    """
+
+    def __init__(self, name, fn, workers=1, executor=None, batch_size=1, batch_wait=1.0):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.executor = executor
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+
+
+class _OrderedEmitter:
+    """Hands results to `on_result` in input order, releasing one admission slot per item."""
+
+    def __init__(self, on_result, window):
+        self.on_result = on_result
+        self.window = window
+        self.buffer = {}
+        self.next_index = 0
+
+    def emit(self, index, value):
+        self.buffer[index] = value
+        while self.next_index in self.buffer:
+            value = self.buffer.pop(self.next_index)
+            if value is not None:
+                self.on_result(value)
+            self.next_index += 1
+            self.window.release()
+
+
+async def run_pipeline_async(items, stages, on_result, queue_size=8, max_pending=64):
+    """
+    Push `items` through `stages` with a bounded queue in front of each stage
+    and deliver the final outputs to `on_result` in input order. At most
+    `max_pending` items are between admission and delivery, so one slow item
+    cannot make the reorder buffer grow without bound.
+    """
+    loop = asyncio.get_running_loop()
+    threads = ThreadPoolExecutor(max_workers=sum(stage.workers for stage in stages))
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+    window = asyncio.Semaphore(max_pending)
+    emitter = _OrderedEmitter(on_result, window)
+
+    async def call(stage, value):
+        # Each call is timed into the metrics registry under the stage's name
+        items = len(value) if stage.batch_size > 1 else 1
+        with registry.timer(stage.name, items=items):
+            if inspect.iscoroutinefunction(stage.fn):
+                return await stage.fn(value)
+            return await loop.run_in_executor(stage.executor or threads, stage.fn, value)
+
+    def consumers(stage):
+        """Readers of the stage's inbox: its collector when it batches, else its workers."""
+        return 1 if stage.batch_size > 1 else stage.workers
+
+    async def feed():
+        for index, item in enumerate(items):
+            await window.acquire()
+            await queues[0].put((index, item))
+        for _ in range(consumers(stages[0])):
+            await queues[0].put(_STOP)
+
+    async def next_batch(stage, inbox):
+        """Up to stage.batch_size jobs, plus whether the stop sentinel was reached."""
+        job = await inbox.get()
+        if job is _STOP:
+            return [], True
+        batch = [job]
+        deadline = loop.time() + stage.batch_wait
+        while len(batch) < stage.batch_size:
+            try:
+                job = await asyncio.wait_for(inbox.get(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                break
+            if job is _STOP:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    async def collect_batches(position, batches):
+        """
+        The only reader of a batching stage's inbox, so every batch fills up to
+        batch_size; workers reading the inbox themselves would each get a share.
+        """
+        stage = stages[position]
+        stopped = False
+        while not stopped:
+            batch, stopped = await next_batch(stage, queues[position])
+            if batch:
+                await batches.put(batch)
+        for _ in range(stage.workers):
+            await batches.put(_STOP)
+
+    async def work(position, batches=None):
+        stage = stages[position]
+        inbox = queues[position]
+        outbox = queues[position + 1] if position + 1 < len(stages) else None
+        while True:
+            if batches is not None:
+                batch = await batches.get()
+                if batch is _STOP:
+                    return
+                indexes = [index for index, _ in batch]
+                try:
+                    results = await call(stage, [value for _, value in batch])
+                except Exception as e:
+                    print(f"[ERROR] {stage.name} stage failed: {e}")
+                    results = [None] * len(batch)
+            else:
+                job = await inbox.get()
+                if job is _STOP:
+                    return
+                index, value = job
+                indexes = [index]
+                try:
+                    results = [await call(stage, value)]
+                except Exception as e:
+                    print(f"[ERROR] {stage.name} stage failed: {e}")
+                    results = [None]
+
+            for index, result in zip(indexes, results):
+                if result is None or outbox is None:
+                    emitter.emit(index, result)
+                else:
+                    await outbox.put((index, result))
+
+    async def run_stage(position):
+        stage = stages[position]
+        if stage.batch_size > 1:
+            batches = asyncio.Queue(maxsize=stage.workers)
+            await asyncio.gather(collect_batches(position, batches),
+                                 *(work(position, batches) for _ in range(stage.workers)))
+        else:
+            await asyncio.gather(*(work(position) for _ in range(stage.workers)))
+        if position + 1 < len(stages):
+            for _ in range(consumers(stages[position + 1])):
+                await queues[position + 1].put(_STOP)
+
+    try:
+        await asyncio.gather(feed(), *(run_stage(position) for position in range(len(stages))))
+    finally:
+        threads.shutdown(wait=False)
+
+
+def run_pipeline(items, stages, on_result, queue_size=8, max_pending=64):
+    asyncio.run(run_pipeline_async(items, stages, on_result, queue_size=queue_size, max_pending=max_pending))
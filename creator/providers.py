@@ -0,0 +1,167 @@
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+
+from creator.rate_limit import QuotaLimiter, estimate_tokens
+from metrics import registry
+
+# Room left in the tokens-per-minute budget for the model's reply
+RESPONSE_TOKEN_ALLOWANCE = 1024
+
+
+class Provider:
+    """
+    One LLM backend (provider + model). Subclasses implement `_complete`;
+    `complete` adds quota pacing through the optional QuotaLimiter so every
+    caller shares the same per-model budget.
+    """
+
+    name = "provider"
+
+    def __init__(self, model, temperature=None, limiter=None):
+        self.model = model
+        self.temperature = temperature
+        self.limiter = limiter
+
+    @property
+    def label(self):
+        return f"{self.name}:{self.model}"
+
+    def complete(self, prompt):
+        prompt_tokens = estimate_tokens(prompt)
+        if self.limiter:
+            self.limiter.acquire(prompt_tokens + RESPONSE_TOKEN_ALLOWANCE)
+        # Timed after pacing, so the histogram shows provider latency rather than quota waits
+        started = time.perf_counter()
+        try:
+            text = self._complete(prompt)
+        except Exception as e:
+            registry.observe(f"llm:{self.label}", time.perf_counter() - started, error=type(e).__name__)
+            raise
+        registry.observe(f"llm:{self.label}", time.perf_counter() - started,
+                         tokens_in=prompt_tokens, tokens_out=estimate_tokens(text or ""))
+        return text
+
+    def _complete(self, prompt):
+        raise NotImplementedError
+
+
+class GeminiProvider(Provider):
+    name = "gemini"
+
+    def __init__(self, model="gemini-2.0-flash", api_key=None, **kwargs):
+        super().__init__(model, **kwargs)
+        self.api_key = api_key
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client(api_key=self.api_key or os.getenv("GEMINI_API_KEY"))
+        return self._client
+
+    def _complete(self, prompt):
+        config = {"temperature": self.temperature} if self.temperature is not None else None
+        response = self.client.models.generate_content(model=self.model, contents=prompt, config=config)
+        return response.text
+
+
+class OpenAIProvider(Provider):
+    name = "openai"
+
+    def __init__(self, model="gpt-4o-mini", api_key=None, **kwargs):
+        super().__init__(model, **kwargs)
+        self.api_key = api_key
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import openai
+            self._client = openai.OpenAI(api_key=self.api_key or os.getenv("OPENAI_API_KEY"))
+        return self._client
+
+    def _complete(self, prompt):
+        kwargs = {"temperature": self.temperature} if self.temperature is not None else {}
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            **kwargs,
+        )
+        return response.choices[0].message.content
+
+
+class FakeProvider(Provider):
+    """
+    Deterministic offline stand-in for routing and tail-latency tests.
+
+    Each call sleeps `latency` seconds; every `slow_every`-th call instead
+    sleeps `slow_latency`, and every `fail_every`-th call raises. Answers are
+    derived from a hash of the prompt, so identical prompts always get
+    identical QUESTION/ANSWER text.
+    """
+
+    name = "fake"
+
+    def __init__(self, model="fake-1", latency=0.05, jitter=0.0, slow_every=0, slow_latency=1.0,
+                 fail_every=0, seed=0, **kwargs):
+        super().__init__(model, **kwargs)
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_every = slow_every
+        self.slow_latency = slow_latency
+        self.fail_every = fail_every
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _complete(self, prompt):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        if self.slow_every and call % self.slow_every == 0:
+            delay = self.slow_latency
+        time.sleep(delay)
+        if self.fail_every and call % self.fail_every == 0:
+            raise RuntimeError(f"{self.label} simulated failure on call {call}")
+        return self.respond(prompt)
+
+    def respond(self, prompt):
+        items = re.findall(r'^### ITEM (\d+)$', prompt, re.MULTILINE)
+        if items:
+            # Packed prompt: answer each numbered item under its own header
+            return "\n\n".join(f"### ITEM {number}\n{self._answer(f'{number}:{prompt}')}" for number in items)
+        return self._answer(prompt)
+
+    def _answer(self, prompt):
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        return f"QUESTION: Fake question {digest} from {self.label}\nANSWER: Fake answer {digest}"
+
+
+def providers_from_env():
+    """
+    Backends available from environment configuration: Gemini when
+    GEMINI_API_KEY is set, OpenAI when OPENAI_API_KEY is set, or only a
+    FakeProvider when EXAMQA_FAKE_LLM=1. Quotas come from <PROVIDER>_RPM/_TPM.
+    """
+    if os.getenv("EXAMQA_FAKE_LLM", "") not in ("", "0", "false"):
+        return [FakeProvider(latency=float(os.getenv("EXAMQA_FAKE_LLM_LATENCY", 0.05)))]
+
+    providers = []
+    if os.getenv("GEMINI_API_KEY"):
+        providers.append(GeminiProvider(
+            os.getenv("GEMINI_MODEL", "gemini-2.0-flash"),
+            limiter=QuotaLimiter(int(os.getenv("GEMINI_RPM", 15)), int(os.getenv("GEMINI_TPM", 1_000_000))),
+        ))
+    if os.getenv("OPENAI_API_KEY"):
+        providers.append(OpenAIProvider(
+            os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+            temperature=0.7,
+            limiter=QuotaLimiter(int(os.getenv("OPENAI_RPM", 500)), int(os.getenv("OPENAI_TPM", 200_000))),
+        ))
+    return providers
@@ -0,0 +1,229 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from creator.csv_writer import FIELDNAMES
+
+PENDING = "pending"
+OK = "ok"
+PARSE_ERROR = "parse_error"
+LLM_ERROR = "llm_error"
+
+# What the CSV layout has always contained: good rows plus rows whose reply could not be parsed
+EXPORTED_STATUSES = (OK, PARSE_ERROR)
+DEFAULT_STORE_PATH = "qa_store.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    discussion_id INTEGER PRIMARY KEY,
+    exam TEXT,
+    topic INTEGER,
+    question_number INTEGER,
+    url TEXT NOT NULL,
+    template TEXT,
+    model TEXT,
+    question TEXT,
+    answer TEXT,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_questions_exam_status ON questions (exam, status);
+CREATE INDEX IF NOT EXISTS idx_questions_status ON questions (status);
+CREATE INDEX IF NOT EXISTS idx_questions_url ON questions (url);
+"""
+
+URL_PARTS = re.compile(r'/view/(\d+)-(exam-[a-z0-9-]+?)-topic-(\d+)-question-(\d+)-discussion')
+
+
+def parse_discussion_url(url):
+    """
+    (discussion_id, exam, topic, question_number) from a discussion URL.
+    URLs without an ExamTopics ID get a stable negative ID derived from the
+    URL, so local and test pages can be stored too.
+    """
+    match = URL_PARTS.search(url)
+    if match:
+        discussion, exam, topic, number = match.groups()
+        return int(discussion), exam, int(topic), int(number)
+    match = re.search(r'/view/(\d+)-', url)
+    if match:
+        return int(match.group(1)), None, None, None
+    return -int(hashlib.sha1(url.encode("utf-8")).hexdigest()[:15], 16), None, None, None
+
+
+def status_for(qa_pair):
+    answer = qa_pair.get("ANSWER") or ""
+    if answer.startswith("[LLM error]"):
+        return LLM_ERROR
+    if answer.startswith("[Parsing error]"):
+        return PARSE_ERROR
+    return OK
+
+
+def exam_from_csv_name(path):
+    match = re.match(r'Practice Questions - (.+)\.csv$', os.path.basename(path))
+    return match.group(1) if match else None
+
+
+class QAStore:
+    """
+    One SQLite table for every exam's questions, keyed by discussion ID.
+
+    Each row tracks exam, topic, question number, source URL, template,
+    model, the QUESTION/ANSWER text and a status (pending, ok, parse_error,
+    llm_error) with created/updated timestamps. Lookups by exam and status
+    go through indexes, so "what is missing for exam X" costs the same
+    however many exams are stored. export_csv() writes the existing
+    'Practice Questions - <exam>.csv' layout.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, commit_every=200):
+        self.path = path
+        self.commit_every = commit_every
+        self._uncommitted = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    # ---- Writes ----
+    def add_urls(self, urls, exam=None):
+        """Register URLs as pending; ones already stored keep their status. Returns how many were new."""
+        now = time.time()
+        rows = []
+        for url in urls:
+            discussion, url_exam, topic, number = parse_discussion_url(url)
+            rows.append((discussion, exam or url_exam, topic, number, url, PENDING, now, now))
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO questions (discussion_id, exam, topic, question_number, url, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows,
+            )
+            self.conn.commit()
+            return self.conn.total_changes - before
+
+    def record(self, url, qa_pair, template=None, model=None, exam=None):
+        """Store one generated Q&A row (as produced for the CSV); returns the status it was filed under."""
+        discussion, url_exam, topic, number = parse_discussion_url(url)
+        status = status_for(qa_pair)
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO questions (discussion_id, exam, topic, question_number, url, template, model, question, answer, "
+                "status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (discussion_id) DO UPDATE SET exam = COALESCE(excluded.exam, exam), url = excluded.url, "
+                "template = excluded.template, model = excluded.model, question = excluded.question, "
+                "answer = excluded.answer, status = excluded.status, updated_at = excluded.updated_at",
+                (discussion, exam or url_exam, topic, number, url, template, model,
+                 qa_pair.get("QUESTION"), qa_pair.get("ANSWER"), status, now, now),
+            )
+            self._uncommitted += 1
+            if self._uncommitted >= self.commit_every:
+                self.conn.commit()
+                self._uncommitted = 0
+        return status
+
+    def commit(self):
+        with self._lock:
+            self.conn.commit()
+            self._uncommitted = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ---- Queries ----
+    def urls(self, exam, statuses=None):
+        """URLs for `exam`, optionally only those in `statuses`, in topic/question order."""
+        query = "SELECT url FROM questions WHERE exam = ?"
+        params = [exam]
+        if statuses:
+            query += f" AND status IN ({', '.join('?' * len(statuses))})"
+            params.extend(statuses)
+        with self._lock:
+            return [row[0] for row in self.conn.execute(query + " ORDER BY topic, question_number, discussion_id", params)]
+
+    def missing(self, exam):
+        """Everything for `exam` that still needs generating: pending, parse errors and LLM errors."""
+        return self.urls(exam, (PENDING, PARSE_ERROR, LLM_ERROR))
+
+    def completed_urls(self, exam):
+        return set(self.urls(exam, (OK,)))
+
+    def counts(self, exam=None):
+        query = "SELECT status, COUNT(*) FROM questions"
+        params = ()
+        if exam:
+            query += " WHERE exam = ?"
+            params = (exam,)
+        with self._lock:
+            return dict(self.conn.execute(query + " GROUP BY status", params).fetchall())
+
+    def exams(self):
+        with self._lock:
+            return [row[0] for row in self.conn.execute("SELECT DISTINCT exam FROM questions WHERE exam IS NOT NULL ORDER BY exam")]
+
+    # ---- Import / export ----
+    def import_url_json(self, path, exam=None):
+        """Register a jsons/<exam>.json URL list."""
+        with open(path, "r", encoding="utf-8") as f:
+            urls = json.load(f)
+        return self.add_urls(urls, exam or os.path.splitext(os.path.basename(path))[0])
+
+    def import_csv(self, path, exam=None):
+        """Load a 'Practice Questions - <exam>.csv' file; rows without a URL column can't be keyed and are skipped."""
+        exam = exam or exam_from_csv_name(path)
+        imported = 0
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if not row.get("URL"):
+                    continue
+                self.record(row["URL"], row, row.get("TEMPLATE") or None, row.get("MODEL") or None, exam)
+                imported += 1
+        self.commit()
+        return imported
+
+    def export_csv(self, exam, path=None, statuses=EXPORTED_STATUSES, fieldnames=FIELDNAMES):
+        """Write `exam` in the existing CSV layout via a temp file and rename. Returns (path, rows)."""
+        path = path or f"Practice Questions - {exam}.csv"
+        query = (f"SELECT question, answer, url, template, model FROM questions WHERE exam = ? "
+                 f"AND status IN ({', '.join('?' * len(statuses))}) ORDER BY topic, question_number, discussion_id")
+        with self._lock:
+            rows = self.conn.execute(query, (exam, *statuses)).fetchall()
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+            writer.writeheader()
+            for question, answer, url, template, model in rows:
+                writer.writerow({"QUESTION": question, "ANSWER": answer, "URL": url, "TEMPLATE": template, "MODEL": model})
+        os.replace(tmp_path, path)
+        return path, len(rows)
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def default_store():
+    """Process-wide store at EXAMQA_STORE (default qa_store.sqlite)."""
+    global _default_store
+    if _default_store is None:
+        with _default_lock:
+            if _default_store is None:
+                _default_store = QAStore(os.getenv("EXAMQA_STORE", DEFAULT_STORE_PATH))
+    return _default_store
@@ -0,0 +1,56 @@
+import threading
+import time
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) for quota accounting."""
+    return len(text or "") // 4 + 1
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `per_minute`.
+
+    Callers reserve tokens up front and then sleep for their turn, so
+    concurrent workers queue fairly. A request larger than the bucket is
+    allowed once the bucket is full and leaves it in debt, which keeps the
+    long-run rate at `per_minute` without ever blocking forever. The refill
+    rate is reduced by the burst size so no 60-second window can exceed
+    `per_minute`.
+    """
+
+    def __init__(self, per_minute, burst=None):
+        self.capacity = burst or max(1, per_minute // 20)
+        self.rate = max(per_minute - self.capacity, 1) / 60.0
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        """Take `amount` tokens now and return how many seconds to wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            needed = min(amount, self.capacity)
+            wait = max(0.0, (needed - self.tokens) / self.rate)
+            self.tokens -= amount
+            return wait
+
+
+class QuotaLimiter:
+    """Requests-per-minute and tokens-per-minute limits for one model, shared by every generate worker."""
+
+    def __init__(self, rpm, tpm=None):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.waited = 0.0
+
+    def acquire(self, tokens=1):
+        wait = self.requests.reserve(1)
+        if self.tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        if wait > 0:
+            self.waited += wait
+            time.sleep(wait)
+        return wait
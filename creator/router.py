@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class AllProvidersFailed(RuntimeError):
+    pass
+
+
+class ProviderStats:
+    """Rolling latency and error window for one provider/model."""
+
+    def __init__(self, window=50):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.last_error = 0.0
+        self.calls = 0
+
+    def record(self, latency, ok):
+        self.calls += 1
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(latency)
+        else:
+            self.last_error = time.monotonic()
+
+    def percentile(self, fraction):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    @property
+    def p50(self):
+        return self.percentile(0.50)
+
+    @property
+    def p95(self):
+        return self.percentile(0.95)
+
+    def error_rate(self):
+        return 1 - sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+
+class Router:
+    """
+    Dispatches each prompt to the fastest healthy provider.
+
+    Providers are ranked by rolling p50 latency; untried providers go first
+    so every backend gets measured. A provider whose recent error rate
+    exceeds `max_error_rate` is skipped until `cooldown` seconds after its
+    last error, then gets probed again. A failed call falls through to the
+    next provider. With `hedge_after` set, a second provider is fired when
+    the first hasn't answered within that many seconds and whichever
+    succeeds first wins.
+    """
+
+    def __init__(self, providers, hedge_after=None, max_error_rate=0.3, cooldown=30.0, window=50):
+        if not providers:
+            raise ValueError("Router needs at least one provider")
+        self.providers = list(providers)
+        self.hedge_after = hedge_after
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.stats = {provider.label: ProviderStats(window) for provider in self.providers}
+        self.hedges = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm")
+
+    def healthy(self, provider):
+        stats = self.stats[provider.label]
+        if stats.error_rate() <= self.max_error_rate:
+            return True
+        return time.monotonic() - stats.last_error >= self.cooldown
+
+    def ranked(self):
+        with self._lock:
+            healthy = [p for p in self.providers if self.healthy(p)]
+            candidates = healthy or list(self.providers)
+            return sorted(candidates, key=lambda p: self.stats[p.label].p50 or 0.0)
+
+    def complete(self, prompt):
+        """Returns (response_text, provider) from the first provider that succeeds."""
+        errors = []
+        candidates = self.ranked()
+        while candidates:
+            primary = candidates.pop(0)
+            if self.hedge_after is None or not candidates:
+                try:
+                    return self._call(primary, prompt), primary
+                except Exception as e:
+                    errors.append(f"{primary.label}: {e}")
+                    continue
+
+            backup = candidates.pop(0)
+            try:
+                return self._hedged(primary, backup, prompt)
+            except AllProvidersFailed as e:
+                errors.append(str(e))
+        raise AllProvidersFailed("; ".join(errors))
+
+    def _hedged(self, primary, backup, prompt):
+        futures = {self._pool.submit(self._call, primary, prompt): primary}
+        done, _ = wait(futures, timeout=self.hedge_after)
+        if not done:
+            self.hedges += 1
+            futures[self._pool.submit(self._call, backup, prompt)] = backup
+
+        errors = []
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = futures[future]
+                try:
+                    return future.result(), provider
+                except Exception as e:
+                    errors.append(f"{provider.label}: {e}")
+            if not pending and len(futures) == 1:
+                # Primary failed before the hedge fired; give the backup its turn
+                try:
+                    return self._call(backup, prompt), backup
+                except Exception as e:
+                    errors.append(f"{backup.label}: {e}")
+        raise AllProvidersFailed("; ".join(errors))
+
+    def _call(self, provider, prompt):
+        started = time.perf_counter()
+        try:
+            result = provider.complete(prompt)
+        except Exception:
+            self._record(provider, time.perf_counter() - started, ok=False)
+            raise
+        self._record(provider, time.perf_counter() - started, ok=True)
+        return result
+
+    def _record(self, provider, latency, ok):
+        with self._lock:
+            self.stats[provider.label].record(latency, ok)
+
+    def describe(self):
+        lines = []
+        for provider in self.providers:
+            stats = self.stats[provider.label]
+            p50 = f"{stats.p50:.2f}s" if stats.p50 is not None else "-"
+            p95 = f"{stats.p95:.2f}s" if stats.p95 is not None else "-"
+            lines.append(f"{provider.label}: {stats.calls} calls | p50 {p50} | p95 {p95} | errors {stats.error_rate():.0%}")
+        if self.hedge_after is not None:
+            lines.append(f"hedged requests: {self.hedges}")
+        return "\n".join(lines)
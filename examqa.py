@@ -0,0 +1,134 @@
+"""
+One entry point for the whole workflow.
+
+    python examqa.py discover --range 101-99999      find discussion URLs, sorted into jsons/<exam>.json
+    python examqa.py retry                           re-check failed IDs whose backoff has expired
+    python examqa.py generate --exam exam-az-900     Q&A into 'Practice Questions - <exam>.csv'
+    python examqa.py batch run --exam exam-az-900    the same through a provider batch API
+    python examqa.py postprocess                     add [View Question] links to every exam CSV
+    python examqa.py store status                    per-exam counts from the Q&A store
+
+Each subcommand imports what it needs (aiohttp, HTML parsers, LLM SDKs,
+pandas) only when it runs, so --help and small jobs start quickly.
+"""
+import argparse
+import os
+import sys
+
+
+def add_generate_arguments(parser, default_exam=None):
+    parser.add_argument("--exam", default=default_exam, required=default_exam is None,
+                        help="Exam name, e.g. exam-az-900; reads jsons/<exam>.json")
+    parser.add_argument("--template", default="standard", help="Prompt template from prompts/templates.json")
+    parser.add_argument("--pack-size", type=int, default=None,
+                        help="Pages per LLM request; above 1 uses the packed template (default EXAMQA_PACK_SIZE or 1)")
+    parser.add_argument("--parse-processes", type=int, default=None,
+                        help="Worker processes for HTML parsing (default EXAMQA_PARSE_PROCESSES or 0 = threads)")
+
+
+def add_log_level_argument(parser):
+    parser.add_argument("--log-level", default=None, choices=["DEBUG", "INFO", "WARNING", "ERROR"], type=str.upper,
+                        help="DEBUG adds every LLM prompt and response; WARNING hides per-URL lines (default EXAMQA_LOG_LEVEL or INFO)")
+
+
+def cmd_discover(args):
+    import scrape_urls
+    scrape_urls.run(args)
+
+
+def cmd_retry(args):
+    import scrape_urls_retry
+    scrape_urls_retry.run(args)
+
+
+def cmd_generate(args):
+    import gemini_question_creator
+    gemini_question_creator.main(args.exam, args.template, args.pack_size, args.parse_processes)
+
+
+def cmd_batch(args):
+    import batch_question_creator
+    batch_question_creator.run(args)
+
+
+def cmd_postprocess(args):
+    import cleanup
+    cleanup.run(args)
+
+
+def cmd_store(args):
+    import glob
+    from creator.qa_store import QAStore
+
+    with QAStore(args.store) as store:
+        if args.action == "import":
+            for path in sorted(glob.glob("jsons/*.json")):
+                print(f"{path}: {store.import_url_json(path)} new URLs")
+            for path in sorted(glob.glob("Practice Questions - *.csv")):
+                print(f"{path}: {store.import_csv(path)} rows")
+        elif args.action == "status":
+            for exam in [args.exam] if args.exam else store.exams():
+                print(f"{exam}: {store.counts(exam)}")
+        elif args.action == "missing":
+            if not args.exam:
+                raise SystemExit("[ERROR] store missing needs --exam")
+            for url in store.missing(args.exam):
+                print(url)
+        elif args.action == "export":
+            for exam in [args.exam] if args.exam else store.exams():
+                path, rows = store.export_csv(exam, args.out if args.exam else None)
+                print(f"{path}: {rows} rows")
+
+
+def build_parser():
+    import batch_question_creator
+    import cleanup
+    import scrape_urls
+    import scrape_urls_retry
+    from creator.qa_store import DEFAULT_STORE_PATH
+
+    parser = argparse.ArgumentParser(prog="examqa", description="ExamTopics practice-question toolkit")
+    add_log_level_argument(parser)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    discover = commands.add_parser("discover", help="Probe discussion IDs and save valid exam URLs")
+    scrape_urls.add_arguments(discover)
+    discover.set_defaults(handler=cmd_discover)
+
+    retry = commands.add_parser("retry", help="Retry failed IDs whose backoff has expired")
+    scrape_urls_retry.add_arguments(retry)
+    retry.set_defaults(handler=cmd_retry)
+
+    generate = commands.add_parser("generate", help="Generate Q&A rows for one exam")
+    add_generate_arguments(generate)
+    generate.set_defaults(handler=cmd_generate)
+
+    batch = commands.add_parser("batch", help="Generate Q&A for one exam through a provider batch API")
+    batch_question_creator.add_arguments(batch)
+    batch.set_defaults(handler=cmd_batch)
+
+    postprocess = commands.add_parser("postprocess", help="Prefix questions with their [View Question] link")
+    cleanup.add_arguments(postprocess)
+    postprocess.set_defaults(handler=cmd_postprocess)
+
+    store = commands.add_parser("store", help="Query, import into or export from the SQLite Q&A store")
+    store.add_argument("action", choices=["import", "status", "missing", "export"],
+                       help="import existing jsons/ and CSVs, show counts, list URLs still to generate, or write CSVs")
+    store.add_argument("--exam", default=None, help="Limit to one exam (required for 'missing')")
+    store.add_argument("--out", default=None, help="CSV path for 'export --exam'")
+    store.add_argument("--store", default=os.getenv("EXAMQA_STORE", DEFAULT_STORE_PATH),
+                       help="Q&A store database (default EXAMQA_STORE or qa_store.sqlite)")
+    store.set_defaults(handler=cmd_store)
+    return parser
+
+
+def main(argv=None):
+    from metrics import configure_logging
+
+    args = build_parser().parse_args(argv)
+    configure_logging(args.log_level)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,118 +1,113 @@
 from dotenv import load_dotenv
+import argparse
+import logging
 import os
+import threading
 
-load_dotenv()
+log = logging.getLogger(__name__)
 
-api_key = os.getenv("GEMINI_API_KEY")
-api_model = "gemini-2.0-flash"
+# Default exam when none is given on the command line
 json_input_file="exam-az-900"
+prompt_template_name = "standard"
 import requests
+from creator.http_cache import default_cache
 
-def fetch_html(url):
+def fetch_page(url):
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.text
+        # Served from the on-disk cache when possible; set EXAMQA_OFFLINE=1 to never hit the network
+        return default_cache().fetch(url, timeout=10)
     except requests.RequestException as e:
-        print(f"[ERROR] Failed to fetch {url}: {e}")
+        log.error(f"[ERROR] Failed to fetch {url}: {e}")
         return None
 
-from bs4 import BeautifulSoup
-import mimetypes
-
-from bs4 import BeautifulSoup
-import requests
-import mimetypes
-from urllib.parse import urljoin
+def fetch_html(url):
+    response = fetch_page(url)
+    return response.text if response else None
 
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-import requests
-import mimetypes
+from creator.images import default_image_fetcher
+from creator.page_parser import extract_exam_page, image_markdown, parse_page
 
 def parse_exam_page(html, base_url):
-    soup = BeautifulSoup(html, "html.parser")
-
-    # 1. Extract full question content from the "question-body" div
-    question_div = soup.find("div", class_="question-body")
-    image_data = []
-    question_text = ""
-
-    if question_div:
-        # Clone the div so we can safely mutate it
-        cloned_div = BeautifulSoup(str(question_div), "html.parser")
-        
-        # Handle any <img> elements: download, and replace with markdown-style links
-        for img in cloned_div.find_all("img"):
-            img_src = img.get("src")
-            if img_src:
-                full_img_url = urljoin(base_url, img_src)
-                try:
-                    img_response = requests.get(full_img_url)
-                    img_response.raise_for_status()
-                    mime_type = img_response.headers.get("Content-Type") or mimetypes.guess_type(full_img_url)[0]
-                    image_data.append({
-                        "url": full_img_url,
-                        "bytes": img_response.content,
-                        "mime_type": mime_type
-                    })
-                    # Replace the image tag with a markdown image tag in the HTML
-                    img.replace_with(f"\n![Image]({full_img_url})\n")
-                except requests.RequestException as e:
-                    print(f"Failed to fetch image: {full_img_url}\nError: {e}")
-        
-        # Get clean text, preserving newlines from <br> tags
-        for br in cloned_div.find_all("br"):
-            br.replace_with("\n")
-
-        question_text = cloned_div.get_text(separator="\n", strip=True)
-
-    # 2. Extract discussion content from the ".discussion-container"
-    discussion_elem = soup.select_one("div.discussion-container")
-    discussion_text = discussion_elem.get_text(separator="\n", strip=True) if discussion_elem else ""
-
+    # Only question-body and discussion-container are walked; EXAMQA_HTML_PARSER picks
+    # selectolax, lxml or bs4 (default: the fastest one installed)
+    question_text, discussion_text, image_urls = extract_exam_page(html, base_url)
+    question_text, image_data = download_images(question_text, image_urls)
     return question_text, discussion_text, image_data
 
-from google import genai
-
-client = genai.Client(api_key=api_key)  # assumes GEMINI_API_KEY is in env vars
-from prompts.prompt_manager import PromptManager
-prompt_manager = PromptManager()
-
-def generate_question_answer(url, text, discussion, images):
-
-    prompt_template = prompt_manager.get("standard")
-    prompt = prompt_template.format(url=url, text=text, discussion=discussion)
-    try:
-        response = client.models.generate_content(
-            model=api_model,
-            contents=prompt,
-        )
-        print("\n\n******** PROMPT + EXTRACTION START ********\n"+prompt+"\n******** PROMPT + EXTRACTION END ********\n\n")
-        print("\n\n******** LLM RESPONSE START ********\n" + response.text + "\n******** LLM RESPONSE END ********\n\n")
-        answer = response.text
-
-        if "QUESTION:" in answer and "ANSWER:" in answer:
-            parts = answer.split("ANSWER:")
-            question = parts[0].replace("QUESTION:", "").strip()
-            answer_text = parts[1].strip()
-            return {"QUESTION": question, "ANSWER": answer_text}
-        else:
-            return {"QUESTION": prompt, "ANSWER": f"[Parsing error] Full response:\n{answer}"}
-    except Exception as e:
-        print(f"[ERROR] LLM request failed: {e}")
-        return {"QUESTION": "", "ANSWER": "[LLM error]"}
+def download_images(question_text, image_urls):
+    # Fetched concurrently and once per URL per run; only ImageRefs are kept, the bytes stay in the blob store
+    refs = default_image_fetcher().fetch_all(image_urls)
+    failed = {image_markdown(url) for url, ref in zip(image_urls, refs) if ref is None}
 
+    if failed:
+        # An image that could not be downloaded is left out of the text, as before
+        question_text = "\n".join(line for line in question_text.split("\n") if line not in failed)
 
-import pandas as pd
-
-def save_to_csv(data, filename=f'Practice Questions - {json_input_file}.csv'):
-    df = pd.DataFrame(data)
-    df.to_csv(filename, index=False)
-    print(f"[INFO] Saved {len(data)} entries to {filename}")
+    return question_text, [ref for ref in refs if ref is not None]
 
+from prompts.prompt_manager import PromptManager
+from creator.llm_cache import default_response_cache
+from creator import generation, packing
+from creator.providers import providers_from_env
+from creator.router import Router
+from creator.dedup import DedupGate, default_question_index
+
+# Templates and the response cache are loaded on first use, not at import; main() builds
+# them before the pipeline starts, and the lock covers any other caller's worker threads
+_prompt_manager = None
+_response_cache = None
+_init_lock = threading.RLock()
+
+def get_prompt_manager():
+    global _prompt_manager
+    if _prompt_manager is None:
+        with _init_lock:
+            if _prompt_manager is None:
+                _prompt_manager = PromptManager()
+    return _prompt_manager
+
+def get_response_cache():
+    global _response_cache
+    if _response_cache is None:
+        with _init_lock:
+            if _response_cache is None:
+                response_cache = default_response_cache()
+                response_cache.sync_templates(get_prompt_manager())
+                _response_cache = response_cache
+    return _response_cache
+
+def build_backend():
+    """
+    Router over every provider configured in the environment (GEMINI_API_KEY,
+    OPENAI_API_KEY, or EXAMQA_FAKE_LLM=1 offline). EXAMQA_HEDGE_AFTER=<seconds>
+    fires a second provider when the first is slower than that.
+    """
+    providers = providers_from_env()
+    if not providers:
+        raise SystemExit("[ERROR] No LLM provider configured: set GEMINI_API_KEY and/or OPENAI_API_KEY")
+    hedge_after = os.getenv("EXAMQA_HEDGE_AFTER")
+    return Router(providers, hedge_after=float(hedge_after) if hedge_after else None)
+
+def generate_question_answer(url, text, discussion, images, backend, template_name=prompt_template_name):
+    return generation.generate_question_answer(
+        url, text, discussion, images, backend, get_prompt_manager(), template_name, get_response_cache(),
+    )
+
+def generate_question_answers_packed(items, backend, fallback_template=prompt_template_name):
+    """`items` is a list of (url, text, discussion, images); returns one Q&A dict per item."""
+    return packing.generate_packed(
+        items, backend, get_prompt_manager(), "packed", get_response_cache(), fallback_template=fallback_template,
+    )
+
+
+from creator.csv_writer import IncrementalCsvWriter, completed_urls
+from creator.qa_store import default_store
+
+
+from creator.pipeline import Stage, run_pipeline
+from concurrent.futures import ProcessPoolExecutor
+from metrics import configure_logging, registry
 
-import time
 def read_urls_from_file(file_path):
     with open(file_path, "r") as file:
         return [line.strip() for line in file if line.strip()]
@@ -123,32 +118,122 @@ def read_urls_from_json(file_path):
     with open(file_path, "r") as file:
         return json.load(file)
 
-def main():
+def main(exam=json_input_file, template=prompt_template_name, pack_size=None, parse_processes=None):
+    """
+    Generate Q&A rows for every URL in jsons/<exam>.json into
+    'Practice Questions - <exam>.csv'. `pack_size` (pages per LLM request;
+    above 1 uses the "packed" template) and `parse_processes` (0 parses on
+    threads) default to EXAMQA_PACK_SIZE and EXAMQA_PARSE_PROCESSES.
+    """
     load_dotenv()
-    url_file = f"jsons/{json_input_file}.json"
+    if pack_size is None:
+        pack_size = int(os.getenv("EXAMQA_PACK_SIZE", 1))
+    if parse_processes is None:
+        parse_processes = int(os.getenv("EXAMQA_PARSE_PROCESSES", 0))
+    url_file = f"jsons/{exam}.json"
+    output_file = f'Practice Questions - {exam}.csv'
     urls = read_urls_from_json(url_file)
-
-    qa_list = []
-
-    total_urls = len(urls)
-    for index, url in enumerate(urls, start=1):
-        print(f"[INFO] Processing: {url} ({index}/{total_urls})")
-        html = fetch_html(url)
-        if not html:
-            continue
-
-        base_url = '/'.join(url.split('/')[:3])
-        question, discussion, images = parse_exam_page(html, base_url)
-
-        qa_pair = generate_question_answer(url, question, discussion, images)
-        qa_list.append(qa_pair)
-
-        time.sleep(2.5)  # Be respectful to servers
-
-    save_to_csv(qa_list)
-
-
+    store = default_store()
+    store.add_urls(urls, exam)
+
+    # Resume: anything already in the CSV was paid for on an earlier run
+    done = completed_urls(output_file)
+    pending = [url for url in urls if url not in done]
+    print(f"[INFO] {len(done)} URLs already in {output_file}, {len(pending)} to go")
+
+    total_urls = len(pending)
+    backend = build_backend()
+    # Shared by every worker thread, so build them once here
+    default_cache()
+    default_image_fetcher()
+    get_response_cache()
+
+    # fetch → parse → generate overlap; each stage has its own worker count and the
+    # generate stage is paced by each provider's RPM/TPM limiter instead of a fixed sleep
+    def fetch(url):
+        # Per-URL progress is INFO so EXAMQA_LOG_LEVEL=WARNING keeps whole-exam runs quiet
+        log.info(f"[INFO] Processing: {url}")
+        response = fetch_page(url)
+        if response is None:
+            return None
+        registry.add("fetch", bytes=len(response.content))
+        return url, response.content, response.headers.get("Content-Type")
+
+    # Parsing is CPU-bound; with parse_processes it runs on that many cores.
+    # Images are downloaded afterwards on threads, outside the parse workers
+    parse_executor = ProcessPoolExecutor(parse_processes) if parse_processes > 0 else None
+
+    def attach_images(record):
+        url, question, discussion, image_urls = record
+        question, images = download_images(question, image_urls)
+        return url, question, discussion, images
+
+    template_name = "packed" if pack_size > 1 else template
+
+    def generate_many(items):
+        if pack_size > 1:
+            return generate_question_answers_packed(items, backend, fallback_template=template)
+        return [generate_question_answer(*item, backend, template_name=template) for item in items]
+
+    # Opt-in (EXAMQA_DEDUP=1): near-duplicate questions (same question on several exams/pages)
+    # share one LLM call
+    dedup = None
+    if os.getenv("EXAMQA_DEDUP", "") not in ("", "0", "false"):
+        dedup = DedupGate(default_question_index(), template_name, get_prompt_manager())
+
+    def generate_batch(items):
+        if dedup:
+            qa_pairs = dedup.run([(item[0], exam, item[1], item) for item in items], generate_many)
+        else:
+            qa_pairs = generate_many(items)
+        # Packed runs regenerate some items with the fallback template; each result says which one it used
+        return [{**qa_pair, "URL": item[0], "TEMPLATE": qa_pair.get("TEMPLATE", template_name)}
+                for item, qa_pair in zip(items, qa_pairs)]
+
+    def generate(item):
+        return generate_batch([item])[0]
+
+    with IncrementalCsvWriter(output_file) as writer:
+        def collect(row):
+            # Every outcome goes to the store, including the failures the CSV leaves out
+            store.record(row["URL"], row, row["TEMPLATE"], row.get("MODEL"), exam)
+            if row["ANSWER"] == "[LLM error]":
+                # Left out so the next run retries it
+                log.warning(f"[WARN] No answer for {row['URL']}; it will be retried on the next run")
+                return
+            with registry.timer("write"):
+                writer.write(row)
+            log.info(f"[INFO] Completed {writer.rows_written}/{total_urls}")
+
+        try:
+            run_pipeline(pending, [
+                Stage("fetch", fetch, workers=8),
+                Stage("parse", parse_page, workers=parse_processes or 2, executor=parse_executor),
+                Stage("images", attach_images, workers=4),
+                Stage("generate", generate_batch, workers=8, batch_size=pack_size)
+                if pack_size > 1 else Stage("generate", generate, workers=8),
+            ], collect)
+        finally:
+            if parse_executor:
+                parse_executor.shutdown()
+
+    store.commit()
+    print(f"[INFO] Saved {writer.rows_written} entries to {output_file}")
+    print(f"[INFO] Q&A store {store.path}: {store.counts(exam)}")
+    print(f"[INFO] {get_response_cache().stats()}")
+    print(f"[INFO] {default_image_fetcher().stats()}")
+    if dedup:
+        print(f"[INFO] {dedup.skipped} near-duplicate pages reused an existing answer")
+    print(f"[INFO] Provider stats:\n{backend.describe()}")
+    print(f"[INFO] Stage metrics:\n{registry.summary()}")
+    json_path, prom_path = registry.write_reports(f"generate-{exam}")
+    print(f"[INFO] Metrics written to {json_path} and {prom_path}")
 
 if __name__ == "__main__":
-    main()
-    
+    from examqa import add_generate_arguments, add_log_level_argument
+    parser = argparse.ArgumentParser(description="Generate practice Q&A for one exam")
+    add_generate_arguments(parser, default_exam=json_input_file)
+    add_log_level_argument(parser)
+    args = parser.parse_args()
+    configure_logging(args.log_level)
+    main(args.exam, args.template, args.pack_size, args.parse_processes)
@@ -0,0 +1,241 @@
+"""
+Run metrics shared by the scrapers and question creators.
+
+Every stage (fetch, resolve, parse, image_fetch, llm:<provider>, write...)
+gets a latency histogram, item and byte counts, token counts and errors by
+class. `registry` is the process-wide collector; write_reports() saves it
+as JSON and as Prometheus text at the end of a run.
+"""
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Seconds; wide enough for a cached page read and a slow LLM call
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# Observations kept per histogram for exact quantiles; beyond this a uniform reservoir sample
+MAX_SAMPLES = 10000
+DEFAULT_METRICS_DIR = "metrics"
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the Prometheus style. Quantiles come from
+    a reservoir of up to `max_samples` observations, so they are exact for
+    runs of that size and a uniform-sample estimate beyond it.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS, max_samples=MAX_SAMPLES):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+        self.max_samples = max_samples
+        self.samples = []
+
+    def observe(self, value):
+        self.counts[_bucket_index(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+        if len(self.samples) < self.max_samples:
+            self.samples.append(value)
+        else:
+            slot = random.randrange(self.count)
+            if slot < self.max_samples:
+                self.samples[slot] = value
+
+    def quantile(self, q):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(list(self.buckets) + [math.inf], self.counts):
+            total += count
+            yield bound, total
+
+
+def _bucket_index(buckets, value):
+    for position, bound in enumerate(buckets):
+        if value <= bound:
+            return position
+    return len(buckets)
+
+
+class StageMetrics:
+    def __init__(self, name):
+        self.name = name
+        self.latency = Histogram()
+        self.items = 0
+        self.errors = Counter()
+        self.bytes = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.first_start = None
+        self.last_end = None
+
+    def throughput(self):
+        """Items per second over the wall-clock span the stage was busy."""
+        if not self.items or self.first_start is None or self.last_end <= self.first_start:
+            return None
+        return self.items / (self.last_end - self.first_start)
+
+    def to_dict(self):
+        return {
+            "calls": self.latency.count,
+            "items": self.items,
+            "errors": dict(self.errors),
+            "bytes": self.bytes,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "latency_seconds": {
+                "mean": self.latency.sum / self.latency.count if self.latency.count else None,
+                "p50": self.latency.quantile(0.5),
+                "p95": self.latency.quantile(0.95),
+                "p99": self.latency.quantile(0.99),
+                "max": self.latency.max,
+            },
+            "throughput_per_second": self.throughput(),
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self.started = time.time()
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def _stage(self, name):
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = StageMetrics(name)
+        return stage
+
+    def observe(self, stage, seconds, items=1, error=None, bytes=0, tokens_in=0, tokens_out=0):
+        """Record one call of `stage` that took `seconds`; `error` is the failure's class name, if any."""
+        now = time.time()
+        with self._lock:
+            metrics = self._stage(stage)
+            metrics.latency.observe(seconds)
+            if error:
+                metrics.errors[error] += 1
+            else:
+                metrics.items += items
+            metrics.bytes += bytes
+            metrics.tokens_in += tokens_in
+            metrics.tokens_out += tokens_out
+            start = now - seconds
+            metrics.first_start = start if metrics.first_start is None else min(metrics.first_start, start)
+            metrics.last_end = now if metrics.last_end is None else max(metrics.last_end, now)
+
+    def add(self, stage, bytes=0, tokens_in=0, tokens_out=0):
+        """Count bytes or tokens against a stage whose calls are timed elsewhere."""
+        with self._lock:
+            metrics = self._stage(stage)
+            metrics.bytes += bytes
+            metrics.tokens_in += tokens_in
+            metrics.tokens_out += tokens_out
+
+    @contextmanager
+    def timer(self, stage, **counts):
+        """Time a block as one call of `stage`; an exception is recorded under its class name and re-raised."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.observe(stage, time.perf_counter() - start, error=type(e).__name__, **counts)
+            raise
+        self.observe(stage, time.perf_counter() - start, **counts)
+
+    def report(self):
+        with self._lock:
+            return {
+                "started_at": self.started,
+                "elapsed_seconds": time.time() - self.started,
+                "stages": {name: stage.to_dict() for name, stage in sorted(self.stages.items())},
+            }
+
+    def prometheus(self):
+        """Prometheus text exposition format, e.g. for node_exporter's textfile collector."""
+        lines = [
+            "# HELP examqa_stage_latency_seconds Time per stage call.",
+            "# TYPE examqa_stage_latency_seconds histogram",
+        ]
+        with self._lock:
+            stages = sorted(self.stages.items())
+            for name, stage in stages:
+                label = _label(name)
+                for bound, total in stage.latency.cumulative():
+                    le = "+Inf" if bound == math.inf else repr(float(bound))
+                    lines.append(f'examqa_stage_latency_seconds_bucket{{stage="{label}",le="{le}"}} {total}')
+                lines.append(f'examqa_stage_latency_seconds_sum{{stage="{label}"}} {stage.latency.sum}')
+                lines.append(f'examqa_stage_latency_seconds_count{{stage="{label}"}} {stage.latency.count}')
+            for metric, help_text, field in (
+                ("examqa_stage_items_total", "Items a stage completed.", "items"),
+                ("examqa_stage_bytes_total", "Bytes transferred by a stage.", "bytes"),
+                ("examqa_stage_tokens_in_total", "Estimated prompt tokens sent.", "tokens_in"),
+                ("examqa_stage_tokens_out_total", "Estimated response tokens received.", "tokens_out"),
+            ):
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                lines += [f'{metric}{{stage="{_label(name)}"}} {getattr(stage, field)}' for name, stage in stages]
+            lines += ["# HELP examqa_stage_errors_total Failed stage calls by error class.",
+                      "# TYPE examqa_stage_errors_total counter"]
+            for name, stage in stages:
+                for error, count in sorted(stage.errors.items()):
+                    lines.append(f'examqa_stage_errors_total{{stage="{_label(name)}",error="{_label(error)}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        rows = []
+        for name, stage in self.report()["stages"].items():
+            latency = stage["latency_seconds"]
+            throughput = stage["throughput_per_second"]
+            rows.append(
+                f"{name:>24}: {stage['items']} items"
+                + (f" | {throughput:.1f}/s" if throughput else "")
+                + (f" | p50 {latency['p50']:.3f}s p95 {latency['p95']:.3f}s" if latency["p50"] is not None else "")
+                + (f" | {stage['bytes'] / 1024:.0f} KB" if stage["bytes"] else "")
+                + (f" | ~{stage['tokens_in']}/{stage['tokens_out']} tokens in/out" if stage["tokens_in"] else "")
+                + (f" | errors {stage['errors']}" if stage["errors"] else "")
+            )
+        return "\n".join(rows)
+
+    def write_reports(self, run_name, directory=None):
+        """Save <dir>/<run_name>.json and <dir>/<run_name>.prom; returns both paths."""
+        directory = directory or os.getenv("EXAMQA_METRICS_DIR", DEFAULT_METRICS_DIR)
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, f"{run_name}.json")
+        prom_path = os.path.join(directory, f"{run_name}.prom")
+        for path, content in ((json_path, json.dumps(self.report(), indent=2)), (prom_path, self.prometheus())):
+            # The textfile collector may read at any moment, so never expose a half-written file
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        return json_path, prom_path
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+registry = Metrics()
+
+
+def configure_logging(level=None):
+    """
+    Log level from `level` or EXAMQA_LOG_LEVEL (default INFO). DEBUG adds
+    the full prompt and response of every LLM call; WARNING silences the
+    per-URL progress lines.
+    """
+    level = (level or os.getenv("EXAMQA_LOG_LEVEL", "INFO")).upper()
+    logging.basicConfig(level=getattr(logging, level, logging.INFO), format="%(message)s")
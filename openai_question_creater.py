@@ -1,15 +1,13 @@
 from dotenv import load_dotenv
 import os
 
-load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-
 import requests
+from creator.http_cache import default_cache
 
 def fetch_html(url):
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        # Served from the on-disk cache when possible; set EXAMQA_OFFLINE=1 to never hit the network
+        response = default_cache().fetch(url, timeout=10)
         return response.text
     except requests.RequestException as e:
         print(f"[ERROR] Failed to fetch {url}: {e}")
@@ -19,9 +17,8 @@ from bs4 import BeautifulSoup
 import mimetypes
 
 from bs4 import BeautifulSoup
-import requests
-import mimetypes
 from urllib.parse import urljoin
+from creator.images import default_image_fetcher
 
 def parse_exam_page(html, base_url):
     soup = BeautifulSoup(html, "html.parser")
@@ -33,21 +30,9 @@ def parse_exam_page(html, base_url):
     # 2. Extract image from inside the question block, if any
     image_data = []
     if question_elem:
-        for img in question_elem.find_all("img"):
-            img_src = img.get("src")
-            if img_src:
-                full_img_url = urljoin(base_url, img_src)
-                try:
-                    img_response = requests.get(full_img_url)
-                    img_response.raise_for_status()
-                    mime_type = img_response.headers.get("Content-Type") or mimetypes.guess_type(full_img_url)[0]
-                    image_data.append({
-                        "url": full_img_url,
-                        "bytes": img_response.content,
-                        "mime_type": mime_type
-                    })
-                except requests.RequestException as e:
-                    print(f"Failed to fetch image: {full_img_url}\nError: {e}")
+        image_urls = [urljoin(base_url, img.get("src")) for img in question_elem.find_all("img") if img.get("src")]
+        # References only; a multimodal prompt reads the bytes with ImageRef.load()
+        image_data = [ref for ref in default_image_fetcher().fetch_all(image_urls) if ref is not None]
     
     # 3. Extract discussion content from the ".discussion-container"
     discussion_elem = soup.select_one("div.discussion-container")
@@ -62,54 +47,46 @@ def parse_exam_page(html, base_url):
     return full_text, image_data
 
 
-import openai
-
-openai.api_key = api_key
-
-import openai
-
-client = openai.OpenAI()  # assumes OPENAI_API_KEY is in env vars
-
-def generate_question_answer(text, images):
-    # Construct markdown-like image references
-    image_notes = "\n".join([f"![Image]({img['url']})" for img in images])
-
-    prompt = f"""
-You are an expert exam tutor. Based ONLY on the content below, generate a single insightful QUESTION and a clear, concise ANSWER. If images are relevant, include their text extraction or reference using markdown image links or describe them.
-
-CONTENT:
-{text}
-
-{image_notes}
-
-FORMAT:
-QUESTION: ...
-ANSWER: ...
-    """
+from prompts.prompt_manager import PromptManager
+from creator.llm_cache import default_response_cache
+from creator import generation
+from creator.providers import OpenAIProvider
+
+api_model = "gpt-4o-mini"  # or "gpt-4-turbo"
+# Nothing is loaded at import: templates, the response cache and the client come on first use
+_prompt_manager = None
+_response_cache = None
+_backend = None
+
+def get_prompt_manager():
+    global _prompt_manager
+    if _prompt_manager is None:
+        _prompt_manager = PromptManager()
+    return _prompt_manager
+
+def get_response_cache():
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = default_response_cache()
+    return _response_cache
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        # The OpenAI client itself is created on the first request, from OPENAI_API_KEY
+        _backend = OpenAIProvider(api_model, api_key=os.getenv("OPENAI_API_KEY"), temperature=0.7)
+    return _backend
+
+def generate_question_answer(url, text, images, template_name="content_with_images"):
+    # The question and discussion are already combined into `text` by parse_exam_page
+    return generation.generate_question_answer(
+        url, text, "", images, get_backend(), get_prompt_manager(), template_name, get_response_cache(),
+    )
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # or "gpt-4-turbo"
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7
-        )
-
-        answer = response.choices[0].message.content
-        if "QUESTION:" in answer and "ANSWER:" in answer:
-            parts = answer.split("ANSWER:")
-            question = parts[0].replace("QUESTION:", "").strip()
-            answer = parts[1].strip()
-            return {"QUESTION": question, "ANSWER": answer}
-        else:
-            return {"QUESTION": "", "ANSWER": f"[Parsing error] Full response:\n{answer}"}
-    except Exception as e:
-        print(f"[ERROR] LLM request failed: {e}")
-        return {"QUESTION": "", "ANSWER": "[LLM error]"}
-
-
-import pandas as pd
 
 def save_to_csv(data, filename='exam_q_and_a.csv'):
+    import pandas as pd
+
     df = pd.DataFrame(data)
     df.to_csv(filename, index=False)
     print(f"[INFO] Saved {len(data)} entries to {filename}")
@@ -135,12 +112,13 @@ def main():
         base_url = '/'.join(url.split('/')[:3])
         text, images = parse_exam_page(html, base_url)
 
-        qa_pair = generate_question_answer(text, images)
+        qa_pair = generate_question_answer(url, text, images)
         qa_list.append(qa_pair)
 
         time.sleep(5)  # Be respectful to servers
 
     save_to_csv(qa_list)
+    print(f"[INFO] {get_response_cache().stats()}")
 
 if __name__ == "__main__":
     main()
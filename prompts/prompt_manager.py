@@ -1,3 +1,4 @@
+import hashlib
 import json
 import os
 
@@ -6,6 +7,7 @@ class PromptManager:
         default_path = os.path.join(os.path.dirname(__file__), "templates.json")
         self.file_path = file_path or default_path
         self.prompts = self._load()
+        self._mtime = os.path.getmtime(self.file_path)
 
     def _load(self):
         if not os.path.exists(self.file_path):
@@ -24,6 +26,23 @@ class PromptManager:
             raise KeyError(f"Prompt '{name}' not found.")
         return self.prompts[name]["template"]
 
+    def fingerprint(self, name):
+        """Hash of a template's text; changes whenever the template is edited."""
+        return hashlib.sha256(self.get(name).encode("utf-8")).hexdigest()
+
+    def reload_if_changed(self):
+        """Re-read the template file if it was edited since loading. Returns True on reload."""
+        mtime = os.path.getmtime(self.file_path)
+        if mtime == self._mtime:
+            return False
+        self.prompts = self._load()
+        self._mtime = mtime
+        return True
+
+    def token_budget(self, name):
+        """Optional per-template cap on discussion tokens (`discussion_token_budget`), or None."""
+        return self.prompts.get(name, {}).get("discussion_token_budget")
+
     def describe(self, name):
         return self.prompts.get(name, {}).get("description", "No description available.")
 
@@ -1,18 +1,8 @@
-import requests
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import os
-import json
+import argparse
+import logging
 
-# Ensure output directories exist
-os.makedirs("jsons", exist_ok=True)
-os.makedirs("jsonsinvalid", exist_ok=True)
-
-BASE_DOMAIN = "https://www.examtopics.com"
-
-def generate_examtopic_urls_from_ranges(ranges):
-    base_url_prefix = f"{BASE_DOMAIN}/discussions/databricks/view/"
-    return [f"{base_url_prefix}{i}-ponce" for start, end in ranges for i in range(start, end + 1)]
+log = logging.getLogger(__name__)
 
 def extract_exam_name(url):
     """
@@ -23,82 +13,86 @@ def extract_exam_name(url):
     match = re.search(r'/view/\d+-(exam-[a-z0-9-]+)-topic-', url)
     return match.group(1) if match else None
 
-def check_url_follow_redirects(url, timeout_seconds=10):
-    try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=timeout_seconds, allow_redirects=True)
-        final_url = response.url
-
-        if response.status_code == 200 and final_url != url:
-            return {'original_url': url, 'is_valid': True, 'final_url': final_url, 'message': f"Redirected to {final_url}"}
-        elif response.status_code == 200:
-            return {'original_url': url, 'is_valid': True, 'final_url': final_url, 'message': "200 OK (no redirect)"}
-        else:
-            return {'original_url': url, 'is_valid': False, 'final_url': None, 'message': f"Status {response.status_code}"}
-    except requests.exceptions.RequestException as e:
-        return {'original_url': url, 'is_valid': False, 'final_url': None, 'message': f"Request failed: {e}"}
-
-def append_unique_json(filepath, new_items):
-    existing_items = set()
-    if os.path.exists(filepath):
-        with open(filepath, "r") as f:
-            existing_items = set(json.load(f))
-
-    combined_items = sorted(existing_items.union(new_items))
-    with open(filepath, "w") as f:
-        json.dump(combined_items, f, indent=2)
-
-if __name__ == "__main__":
-    ranges_to_check = [(101, 100000-1)]
-    urls = generate_examtopic_urls_from_ranges(ranges_to_check)
-    print(f"🔍 Checking {len(urls)} URLs from ranges: {ranges_to_check}\n")
-
-    max_workers = 50
-    valid_redirects = []
-    invalid_urls = []
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(check_url_follow_redirects, url): url for url in urls}
-        for future in as_completed(futures):
-            result = future.result()
-            print(f"{result['original_url']} → {'✅' if result['is_valid'] else '❌'} | {result['message']}")
-
-            if result['is_valid'] and result['final_url']:
-                exam_name = extract_exam_name(result['final_url'])
-                if exam_name:
-                    filepath = f"jsons/{exam_name}.json"
-                    append_unique_json(filepath, [result['final_url']])
-                else:
-                    # Couldn't extract exam name, treat as invalid
-                    append_unique_json("jsonsinvalid/failures.json", [result['original_url']])
-            else:
-                append_unique_json("jsonsinvalid/failures.json", [result['original_url']])
-
-
-    # Save valid redirects into per-exam JSON files
+def parse_range(value):
+    start, _, end = value.partition("-")
+    return int(start), int(end or start)
+
+def add_arguments(parser):
+    parser.add_argument("--resolve", choices=["get", "head"], default="head",
+                        help="'head' follows redirects without downloading pages; 'get' downloads every final page")
+    parser.add_argument("--range", dest="ranges", type=parse_range, action="append",
+                        help="ID range to scan, e.g. 101-99999 (repeatable)")
+    parser.add_argument("--above-hwm", type=int, metavar="COUNT",
+                        help="Only scan COUNT IDs above the highest ID resolved so far")
+    parser.add_argument("--full", action="store_true", help="Ignore crawl state and probe every ID in range")
+    parser.add_argument("--state", default="crawl_state.sqlite", help="Crawl state database")
+    parser.add_argument("--plan", action="store_true",
+                        help="Sample the range sparsely and probe densely only around target-vendor hits and above the highest known ID")
+    parser.add_argument("--vendor", dest="vendors", action="append",
+                        help="Target vendor for --plan (repeatable, default databricks)")
+    parser.add_argument("--stride", type=int, default=50, help="Distance between sparse samples for --plan")
+    parser.add_argument("--coverage-state", metavar="PATH",
+                        help="Crawl state from an earlier full scan; --plan reports which of its target IDs it found")
+
+def run(args):
+    # aiohttp and the scraper modules load only when discovery actually runs
+    from scraper.discovery import generate_examtopic_urls_from_ranges, generate_examtopic_urls, count_urls, discover, TransferStats
+    from scraper.result_sink import ResultSink
+    from scraper.concurrency import AimdController
+    from scraper.crawl_state import CrawlState
+    from metrics import registry
+
+    state = CrawlState(args.state)
+    if args.above_hwm:
+        high_water_mark = state.high_water_mark()
+        ranges_to_check = [(high_water_mark + 1, high_water_mark + args.above_hwm)]
+    else:
+        ranges_to_check = args.ranges or [(101, 100000-1)]
+
+    if args.plan:
+        urls = None
+        print(f"🧭 Planning probes over ranges: {ranges_to_check} (targets: {', '.join(args.vendors or ['databricks'])})\n")
+    elif args.full:
+        urls = generate_examtopic_urls_from_ranges(ranges_to_check)
+        print(f"🔍 Checking {count_urls(ranges_to_check)} URLs from ranges: {ranges_to_check}\n")
+    else:
+        urls = generate_examtopic_urls(state.pending_ids(ranges_to_check))
+        print(f"🔍 Checking unsettled IDs from ranges: {ranges_to_check} (state: {state.counts()})\n")
+
+    controller = AimdController(initial=50, maximum=300)
     saved = {}
-    for redirected_url in valid_redirects:
-        exam_name = extract_exam_name(redirected_url)
-        if exam_name:
-            filepath = f"jsons/{exam_name}.json"
-            append_unique_json(filepath, [redirected_url])
-            saved.setdefault(exam_name, 0)
-            saved[exam_name] += 1
-        else:
-            print(f"⚠️ Couldn't extract exam name from: {redirected_url}")
-            invalid_urls.append({'original_url': redirected_url, 'reason': "Could not extract exam name"})
-
-    # Save invalid URLs to a single JSON file
-    failures_path = "jsonsinvalid/failures.json"
-    failure_entries = []
-
-    for item in invalid_urls:
-        if isinstance(item, dict):
-            failure_entries.append(f"{item.get('original_url', 'UNKNOWN')} — {item.get('reason', item.get('message', 'No reason'))}")
+    counts = {"valid": 0, "invalid": 0}
+    sink = ResultSink()
+    transfer = TransferStats()
+
+    def handle_result(result):
+        transfer.add(result)
+        # Per-ID lines are INFO so EXAMQA_LOG_LEVEL=WARNING keeps large ranges quiet
+        log.info(f"{result['original_url']} → {'✅' if result['is_valid'] else '❌'} | {result['message']}")
+
+        reason = result['message']
+        exam_name = extract_exam_name(result['final_url']) if result['is_valid'] and result['final_url'] else None
+        state.record(result, exam_name)
+
+        if result['is_valid'] and result['final_url']:
+            if exam_name:
+                if sink.add_valid(exam_name, result['final_url']):
+                    saved[exam_name] = saved.get(exam_name, 0) + 1
+                # A URL that failed in an earlier run is dropped from failures.json once it resolves
+                sink.resolve_failure(result['original_url'])
+                counts["valid"] += 1
+                return
+            # Couldn't extract exam name, treat as invalid
+            log.warning(f"⚠️ Couldn't extract exam name from: {result['final_url']}")
+            reason = "Could not extract exam name"
+        sink.add_failure(result['original_url'], reason)
+        counts["invalid"] += 1
+
+    with state, sink:
+        if args.plan:
+            plan_reports = run_plan(args, ranges_to_check, state, handle_result, controller)
         else:
-            failure_entries.append(str(item))
-
-    append_unique_json(failures_path, failure_entries)
+            discover(urls, handle_result, controller=controller, resolve=args.resolve)
 
     # Summary output
     print("\n✅ Saved exam redirects to:")
@@ -106,4 +100,49 @@ if __name__ == "__main__":
         print(f" - {exam}.json: {count} new entries")
 
     print(f"\n📊 Summary:")
-    print(f"Checked: {len(urls)} | Valid: {len(valid_redirects)} | Invalid: {len(invalid_urls)}")
+    print(f"Checked: {counts['valid'] + counts['invalid']} | Valid: {counts['valid']} | Invalid: {counts['invalid']}")
+    print(f"Transfer ({args.resolve}): {transfer.summary()}")
+    print(f"Concurrency: {controller.describe()}")
+    if args.plan:
+        from scraper.planner import describe
+        for report in plan_reports:
+            print(f"Plan: {describe(report)}")
+    print(f"Metrics written to {' and '.join(registry.write_reports('discover'))}")
+
+def run_plan(args, ranges, state, handle_result, controller):
+    """Probe each range through an IdSpacePlanner seeded from the crawl state; returns one report per range."""
+    from scraper.crawl_state import CrawlState
+    from scraper.discovery import discover, generate_examtopic_urls
+    from scraper.planner import IdSpacePlanner, target_hits_from_state
+
+    vendors = args.vendors or ["databricks"]
+    coverage_state = CrawlState(args.coverage_state) if args.coverage_state else None
+    reports = []
+    for start, end in ranges:
+        planner = IdSpacePlanner(start, end, vendors, stride=args.stride,
+                                 known_max=0 if args.full else state.high_water_mark())
+        if not args.full:
+            planner.seed(state.settled_outcomes(start, end))
+
+        def on_result(result):
+            handle_result(result)
+            exam = extract_exam_name(result['final_url']) if result['is_valid'] and result['final_url'] else None
+            planner.observe(result, exam)
+
+        planner.run(lambda ids: discover(generate_examtopic_urls(ids), on_result, controller=controller, resolve=args.resolve))
+        full_scan_hits = target_hits_from_state(coverage_state, start, end, vendors) if coverage_state else None
+        reports.append(planner.report(full_scan_hits))
+    if coverage_state:
+        coverage_state.close()
+    return reports
+
+def main():
+    from metrics import configure_logging
+
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Discover ExamTopics discussion URLs by ID")
+    add_arguments(parser)
+    run(parser.parse_args())
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,12 @@
-import os
+import argparse
+import logging
 import re
-import json
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # ---- Setup ----
 BASE_DOMAIN = "https://www.examtopics.com"
-os.makedirs("jsons", exist_ok=True)
-os.makedirs("jsonsinvalid", exist_ok=True)
+log = logging.getLogger(__name__)
 
 # ---- Utils ----
-def normalize_url(line):
-    """Extract URL from strings like '<url> — reason' or keep line if clean."""
-    if '—' in line:
-        return line.split('—')[0].strip()
-    return line.strip()
-
 def extract_exam_name(url):
     """
     Extracts the core 'exam-[...]' portion from ExamTopics URLs,
@@ -24,90 +15,63 @@ def extract_exam_name(url):
     match = re.search(r'/view/\d+-(exam-[a-z0-9-]+?)(?:-topic-|-question-|/|$)', url)
     return match.group(1) if match else None
 
-
-
-def check_url_follow_redirects(url, timeout_seconds=10):
-    try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=timeout_seconds, allow_redirects=True)
-        final_url = response.url
-
-        if response.status_code == 200 and final_url != url:
-            return {'original_url': url, 'is_valid': True, 'final_url': final_url, 'message': f"Redirected to {final_url}"}
-        elif response.status_code == 200:
-            return {'original_url': url, 'is_valid': True, 'final_url': final_url, 'message': "200 OK (no redirect)"}
-        else:
-            return {'original_url': url, 'is_valid': False, 'message': f"Status {response.status_code}"}
-    except requests.RequestException as e:
-        return {'original_url': url, 'is_valid': False, 'message': f"Request failed: {e}"}
-
-def append_unique_json(filepath, new_items):
-    """Append only unique items to a JSON file."""
-    existing = set()
-    if os.path.exists(filepath):
-        with open(filepath, 'r') as f:
-            try:
-                existing = set(json.load(f))
-            except json.JSONDecodeError:
-                pass
-    combined = list(existing.union(new_items))
-    with open(filepath, 'w') as f:
-        json.dump(sorted(combined), f, indent=2)
+def add_arguments(parser):
+    parser.add_argument("--state", default="crawl_state.sqlite", help="Crawl state database")
 
 # ---- Main Processing ----
-def main():
-    # Load and clean failed URLs
-    with open("jsonsinvalid/failures.json", "r") as f:
-        raw_lines = json.load(f)
-    all_urls = {normalize_url(line) for line in raw_lines if line.startswith("http")}
-
-    print(f"🔁 Retrying {len(all_urls)} failed URLs...\n")
-    valid_redirects = []
-    failed_entries = []
-
-    with ThreadPoolExecutor(max_workers=50) as executor:
-        futures = {executor.submit(check_url_follow_redirects, url): url for url in all_urls}
-        for future in as_completed(futures):
-            result = future.result()
+def run(args):
+    from scraper.discovery import discover, generate_examtopic_urls
+    from scraper.result_sink import ResultSink
+    from scraper.concurrency import AimdController
+    from scraper.crawl_state import CrawlState
+    from metrics import registry
+
+    with CrawlState(args.state) as state, ResultSink() as sink:
+        # Older runs only left failures.json behind; fold those into the crawl state first
+        state.import_failures(sink.failures())
+        due_ids = state.due_failures()
+
+        print(f"🔁 Retrying {len(due_ids)} failed IDs whose backoff has expired ({state.counts()})...\n")
+        controller = AimdController(initial=50, maximum=300)
+        counts = {"valid": 0, "failed": 0}
+        saved_by_exam = {}
+
+        def handle_result(result):
             url = result['original_url']
-            print(f"{url} → {'✅' if result['is_valid'] else '❌'} | {result['message']}")
-            if result['is_valid']:
-                valid_redirects.append(result['final_url'])
-            else:
-                failed_entries.append(f"{url} — {result['message']}")
+            log.info(f"{url} → {'✅' if result['is_valid'] else '❌'} | {result['message']}")
+            exam = extract_exam_name(result['final_url']) if result['is_valid'] else None
+            state.record(result, exam)
+            if not result['is_valid']:
+                sink.add_failure(url, result['message'])
+                counts["failed"] += 1
+                return
 
-    # Write successful URLs to JSON per exam
-    successes_by_exam = {}
-    for url in valid_redirects:
-        exam = extract_exam_name(url)
-        if exam:
-            successes_by_exam.setdefault(exam, []).append(url)
-        else:
-            failed_entries.append(f"{url} — Could not extract exam name")
+            if not exam:
+                sink.add_failure(url, "Could not extract exam name")
+                counts["failed"] += 1
+                return
 
-    for exam, urls in successes_by_exam.items():
-        filepath = f"jsons/{exam}.json"
-        append_unique_json(filepath, urls)
-        print(f"✅ {len(urls)} valid URLs saved to {filepath}")
+            sink.add_valid(exam, result['final_url'])
+            sink.resolve_failure(url)
+            saved_by_exam[exam] = saved_by_exam.get(exam, 0) + 1
+            counts["valid"] += 1
 
-    # Load old failures
-    with open("jsonsinvalid/failures.json", "r") as f:
-        original_failures = set(normalize_url(line) for line in json.load(f) if line.startswith("http"))
+        discover(generate_examtopic_urls(due_ids), handle_result, controller=controller)
 
-    # Remove successfully resolved URLs
-    remaining_failures = original_failures - set(valid_redirects)
+    for exam, count in saved_by_exam.items():
+        print(f"✅ {count} valid URLs saved to jsons/{exam}.json")
 
-    # Add newly failed entries to the remaining list
-    for line in failed_entries:
-        url = normalize_url(line)
-        remaining_failures.add(f"{url} — {line.split('—')[-1].strip()}")
-
-    # Write back the cleaned failure list
-    with open("jsonsinvalid/failures.json", "w") as f:
-        json.dump(sorted(remaining_failures), f, indent=2)
+    print(f"\n✅ Done. {counts['valid']} valid | {counts['failed']} still failed.")
+    print(f"Concurrency: {controller.describe()}")
+    print(f"Metrics written to {' and '.join(registry.write_reports('retry'))}")
 
+def main():
+    from metrics import configure_logging
 
-    print(f"\n✅ Done. {len(valid_redirects)} valid | {len(failed_entries)} still failed.")
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Re-check failed discussion IDs whose backoff has expired")
+    add_arguments(parser)
+    run(parser.parse_args())
 
 if __name__ == "__main__":
     main()
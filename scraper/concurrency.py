@@ -0,0 +1,172 @@
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+
+CONGESTION_STATUSES = {429, 503}
+TRANSIENT_STATUSES = {500, 502, 504}
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify(result):
+    """
+    Sort a resolver result into 'ok', 'congestion', 'transient' or 'permanent'.
+    Congestion (429, 503, timeouts) shrinks the window; transient failures are
+    retried without shrinking it; permanent answers (404 and friends, or a
+    result flagged 'permanent' such as a redirect loop) are final.
+    """
+    status = result.get('status')
+    if result.get('is_valid'):
+        return "ok"
+    if result.get('permanent'):
+        return "permanent"
+    if status in CONGESTION_STATUSES or result.get('timed_out'):
+        return "congestion"
+    if status is None or status in TRANSIENT_STATUSES:
+        return "transient"
+    return "permanent"
+
+
+class AimdController:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests.
+
+    The limit grows by `increase` after each full window of healthy responses
+    (latency under `latency_target` and a recent error rate under
+    `max_error_rate`) and is multiplied by `decrease` on congestion, at most
+    once per `cooldown` seconds so one burst of 429s counts as one signal.
+    A Retry-After pauses every new request until it has passed.
+    """
+
+    def __init__(self, initial=50, minimum=1, maximum=300, increase=1, decrease=0.5,
+                 latency_target=3.0, max_error_rate=0.05, cooldown=1.0, window=100):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+
+        self.in_flight = 0
+        self.peak_limit = self.limit
+        self.cuts = 0
+        self.retries = 0
+        self._healthy_streak = 0
+        self._recent = deque(maxlen=window)
+        self._last_cut = 0.0
+        self._paused_until = 0.0
+        self._condition = None
+        self._loop = None
+
+    # ---- Slots ----
+    @asynccontextmanager
+    async def slot(self):
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            # One controller can drive several discover() runs, each on its own event loop
+            self._condition = asyncio.Condition()
+            self._loop = loop
+
+        async with self._condition:
+            while self.in_flight >= int(self.limit):
+                await self._condition.wait()
+            self.in_flight += 1
+
+        try:
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            yield
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    # ---- Signals ----
+    def on_success(self, latency):
+        self._recent.append(False)
+        if latency > self.latency_target or self.error_rate() > self.max_error_rate:
+            self._healthy_streak = 0
+            return
+        self._healthy_streak += 1
+        if self._healthy_streak >= int(self.limit):
+            self._healthy_streak = 0
+            self.limit = min(self.maximum, self.limit + self.increase)
+            self.peak_limit = max(self.peak_limit, self.limit)
+
+    def on_error(self):
+        self._recent.append(True)
+        self._healthy_streak = 0
+
+    def on_congestion(self, retry_after=None):
+        self.on_error()
+        now = time.monotonic()
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+        if now - self._last_cut >= self.cooldown:
+            self._last_cut = now
+            self.limit = max(self.minimum, self.limit * self.decrease)
+            self.cuts += 1
+
+    def error_rate(self):
+        return sum(self._recent) / len(self._recent) if self._recent else 0.0
+
+    def describe(self):
+        return (
+            f"limit {int(self.limit)} (peak {int(self.peak_limit)}) | "
+            f"{self.cuts} cuts | {self.retries} inline retries | "
+            f"recent error rate {self.error_rate():.1%}"
+        )
+
+
+def backoff_delay(attempt, base_delay=0.5, max_delay=30.0):
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+async def call_with_retries(controller, request, max_attempts=5, base_delay=0.5, max_delay=30.0):
+    """
+    Run `request()` (a coroutine factory returning a resolver result) inside a
+    controller slot, feeding the outcome back into the controller and retrying
+    congestion/transient failures inline with jittered exponential backoff.
+    The final result records how many attempts it took.
+    """
+    for attempt in range(1, max_attempts + 1):
+        async with controller.slot():
+            result = await request()
+
+        outcome = classify(result)
+        if outcome in ("ok", "permanent"):
+            # A clean 404 is still a healthy server
+            controller.on_success(result.get('elapsed', 0.0))
+            break
+
+        retry_after = result.get('retry_after')
+        if outcome == "congestion":
+            controller.on_congestion(retry_after)
+        else:
+            controller.on_error()
+
+        if attempt == max_attempts:
+            break
+        controller.retries += 1
+        await asyncio.sleep(retry_after or backoff_delay(attempt, base_delay, max_delay))
+
+    result['attempts'] = attempt
+    return result
@@ -0,0 +1,157 @@
+import re
+import sqlite3
+import time
+
+RESOLVED = "resolved"
+NO_EXAM = "no_exam"
+NOT_FOUND = "not_found"
+FAILED = "failed"
+
+# Settled IDs are never probed again; the others come back once next_check passes
+SETTLED_STATUSES = (RESOLVED, NO_EXAM)
+
+FAILURE_BACKOFF_BASE = 60
+FAILURE_BACKOFF_CAP = 24 * 60 * 60
+NOT_FOUND_RECHECK = 7 * 24 * 60 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS discussions (
+    id INTEGER PRIMARY KEY,
+    status TEXT NOT NULL,
+    final_url TEXT,
+    exam TEXT,
+    message TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_checked REAL NOT NULL,
+    next_check REAL
+);
+CREATE INDEX IF NOT EXISTS idx_discussions_status_next ON discussions (status, next_check);
+"""
+
+
+def discussion_id(url):
+    """Numeric ExamTopics discussion ID from any '/view/<id>-...' URL."""
+    match = re.search(r'/view/(\d+)-', url)
+    return int(match.group(1)) if match else None
+
+
+def _status_for(result, exam):
+    if result['is_valid']:
+        return RESOLVED if exam else NO_EXAM
+    if result.get('status') in (404, 410):
+        return NOT_FOUND
+    return FAILED
+
+
+class CrawlState:
+    """
+    SQLite record of every discussion ID the scrapers have probed: status,
+    final URL, exam name, attempt count and when it was last / next checked.
+    Lets a run resume after a crash, skip settled IDs, start above the
+    high-water mark and re-check only failures whose backoff has expired.
+    """
+
+    def __init__(self, path="crawl_state.sqlite", commit_every=500):
+        self.path = path
+        self.commit_every = commit_every
+        self._uncommitted = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    # ---- Writes ----
+    def record(self, result, exam=None):
+        """Store one resolver result; returns the status it was filed under."""
+        discussion = discussion_id(result['original_url'])
+        if discussion is None:
+            return None
+
+        status = _status_for(result, exam)
+        now = time.time()
+        row = self.conn.execute("SELECT attempts FROM discussions WHERE id = ?", (discussion,)).fetchone()
+        attempts = (row[0] if row else 0) + result.get('attempts', 1)
+
+        if status == FAILED:
+            next_check = now + min(FAILURE_BACKOFF_CAP, FAILURE_BACKOFF_BASE * 2 ** (attempts - 1))
+        elif status == NOT_FOUND:
+            next_check = now + NOT_FOUND_RECHECK
+        else:
+            next_check = None
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO discussions (id, status, final_url, exam, message, attempts, last_checked, next_check) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (discussion, status, result.get('final_url'), exam, result.get('message'), attempts, now, next_check),
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self.commit()
+        return status
+
+    def import_failures(self, urls):
+        """Seed legacy failures.json entries as failures that are due now."""
+        rows = [(discussion_id(url), time.time()) for url in urls]
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO discussions (id, status, attempts, last_checked, next_check) VALUES (?, 'failed', 0, ?, 0)",
+            [row for row in rows if row[0] is not None],
+        )
+        self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ---- Queries ----
+    def high_water_mark(self):
+        """Highest discussion ID that resolved to an exam page, or 0."""
+        row = self.conn.execute("SELECT MAX(id) FROM discussions WHERE status = ?", (RESOLVED,)).fetchone()
+        return row[0] or 0
+
+    def pending_ids(self, ranges, block_size=10000, now=None):
+        """
+        Yield IDs from `ranges` that still need probing: never seen, or an
+        unsettled status whose backoff has expired. Reads the table one block
+        at a time so memory stays flat over huge ranges.
+        """
+        now = time.time() if now is None else now
+        for start, end in ranges:
+            for block_start in range(start, end + 1, block_size):
+                block_end = min(end, block_start + block_size - 1)
+                skip = {row[0] for row in self.conn.execute(
+                    "SELECT id FROM discussions WHERE id BETWEEN ? AND ? "
+                    "AND (status IN (?, ?) OR next_check > ?)",
+                    (block_start, block_end, *SETTLED_STATUSES, now),
+                )}
+                for i in range(block_start, block_end + 1):
+                    if i not in skip:
+                        yield i
+
+    def settled_outcomes(self, start, end):
+        """(id, status, final_url, exam) for every settled or not-found ID in [start, end], in ID order."""
+        return self.conn.execute(
+            "SELECT id, status, final_url, exam FROM discussions WHERE id BETWEEN ? AND ? AND status IN (?, ?, ?) ORDER BY id",
+            (start, end, *SETTLED_STATUSES, NOT_FOUND),
+        ).fetchall()
+
+    def due_failures(self, now=None):
+        """IDs whose failure backoff has expired, oldest check first."""
+        now = time.time() if now is None else now
+        rows = self.conn.execute(
+            "SELECT id FROM discussions WHERE status IN (?, ?) AND next_check <= ? ORDER BY last_checked",
+            (FAILED, NOT_FOUND, now),
+        )
+        return [row[0] for row in rows]
+
+    def counts(self):
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM discussions GROUP BY status"))
@@ -0,0 +1,210 @@
+import asyncio
+import time
+from urllib.parse import urljoin, urlsplit
+
+import aiohttp
+
+from metrics import registry
+from scraper.concurrency import AimdController, call_with_retries, parse_retry_after
+
+BASE_DOMAIN = "https://www.examtopics.com"
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+MAX_REDIRECTS = 10
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+HEAD_REJECTED_STATUSES = {405, 501}
+# Redirect bodies are tiny; reading them keeps the connection reusable
+MAX_DRAIN_BYTES = 64 * 1024
+
+
+def generate_examtopic_urls(ids, vendor="databricks", base_domain=BASE_DOMAIN):
+    """Yield discussion URLs one at a time so a 100k-ID range never sits in memory."""
+    base_url_prefix = f"{base_domain}/discussions/{vendor}/view/"
+    for i in ids:
+        yield f"{base_url_prefix}{i}-ponce"
+
+
+def generate_examtopic_urls_from_ranges(ranges, vendor="databricks", base_domain=BASE_DOMAIN):
+    ids = (i for start, end in ranges for i in range(start, end + 1))
+    return generate_examtopic_urls(ids, vendor, base_domain)
+
+
+def count_urls(ranges):
+    return sum(end - start + 1 for start, end in ranges)
+
+
+def make_session(max_connections):
+    """One pooled session: keep-alive connections are reused per host across every request."""
+    connector = aiohttp.TCPConnector(
+        limit=max_connections,
+        limit_per_host=max_connections,
+        keepalive_timeout=30,
+        ttl_dns_cache=300,
+    )
+    return aiohttp.ClientSession(connector=connector, headers=HEADERS)
+
+
+def _header_bytes(response):
+    # Status line plus "Name: value\r\n" per header plus the blank line
+    return 15 + sum(len(name) + len(value) + 4 for name, value in response.raw_headers) + 2
+
+
+def _result(url, response, final_url, started, transferred):
+    status = response.status
+    result = {
+        'original_url': url, 'status': status, 'bytes': transferred, 'elapsed': time.perf_counter() - started,
+        'retry_after': parse_retry_after(response.headers.get("Retry-After")),
+    }
+    if status == 200 and final_url != url:
+        result.update(is_valid=True, final_url=final_url, message=f"Redirected to {final_url}")
+    elif status == 200:
+        result.update(is_valid=True, final_url=final_url, message="200 OK (no redirect)")
+    else:
+        result.update(is_valid=False, final_url=None, message=f"Status {status}")
+    return result
+
+
+def _failed(url, started, transferred, error):
+    return {
+        'original_url': url, 'is_valid': False, 'final_url': None, 'status': None,
+        'bytes': transferred, 'elapsed': time.perf_counter() - started,
+        'timed_out': isinstance(error, asyncio.TimeoutError),
+        'message': f"Request failed: {error!r}",
+    }
+
+
+async def check_url_follow_redirects(session, url, timeout_seconds=10):
+    """Legacy resolution: GET with redirects followed and the final page body downloaded."""
+    started = time.perf_counter()
+    transferred = 0
+    try:
+        timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+        async with session.get(url, timeout=timeout, allow_redirects=True) as response:
+            # Drain the body so the connection goes back to the pool instead of being closed
+            body = await response.read()
+            transferred = sum(_header_bytes(hop) for hop in response.history) + _header_bytes(response) + len(body)
+            return _result(url, response, str(response.url), started, transferred)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        return _failed(url, started, transferred, e)
+
+
+async def resolve_redirect(session, url, timeout_seconds=10, hosts_rejecting_head=None):
+    """
+    Redirect-only resolution: walk the redirect chain hop by hop with HEAD and
+    stop as soon as a non-redirect status arrives, never downloading the page
+    body. Hosts that answer HEAD with 405/501 are retried with a GET whose
+    connection is closed straight after the headers, and remembered in
+    `hosts_rejecting_head` so later IDs skip the wasted HEAD.
+    """
+    started = time.perf_counter()
+    transferred = 0
+    hosts_rejecting_head = hosts_rejecting_head if hosts_rejecting_head is not None else set()
+    timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+    current = url
+
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            host = urlsplit(current).netloc
+            method = "GET" if host in hosts_rejecting_head else "HEAD"
+            response = await session.request(method, current, timeout=timeout, allow_redirects=False)
+            try:
+                transferred += _header_bytes(response)
+
+                if method == "HEAD" and response.status in HEAD_REJECTED_STATUSES:
+                    hosts_rejecting_head.add(host)
+                    continue
+
+                location = response.headers.get("Location")
+                if response.status in REDIRECT_STATUSES and location:
+                    # Only a small body of known size is worth reading to keep the connection;
+                    # a chunked one (no Content-Length) may be a whole page, so it is closed unread
+                    if method == "GET" and response.content_length is not None and response.content_length <= MAX_DRAIN_BYTES:
+                        transferred += len(await response.read())
+                    current = urljoin(current, location)
+                    continue
+
+                return _result(url, response, current, started, transferred)
+            finally:
+                if method == "GET" and not response.closed and response.content_length != 0:
+                    # Unread body: drop the connection rather than download the page
+                    response.close()
+                else:
+                    response.release()
+
+        # A redirect loop won't resolve on retry, even though there is no final status to say so
+        return {**_failed(url, started, transferred, "too many redirects"), 'message': "Too many redirects",
+                'permanent': True}
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        return _failed(url, started, transferred, e)
+
+
+def result_error(result):
+    """Error class for the metrics report: None for a valid ID, else http_<status>, timeout or connection."""
+    if result['is_valid']:
+        return None
+    if result.get('status'):
+        return f"http_{result['status']}"
+    return "timeout" if result.get('timed_out') else "connection"
+
+
+RESOLVERS = {
+    "head": resolve_redirect,
+    "get": check_url_follow_redirects,
+}
+
+
+async def discover_async(urls, on_result, controller=None, timeout_seconds=10, resolve="head", max_attempts=5):
+    """
+    Check every URL from the (possibly lazy) `urls` iterable. The number of
+    requests in flight is set by `controller` (an AimdController), which grows
+    it while the server stays healthy and cuts it on 429/503/timeouts;
+    transient failures are retried inline. Each result is handed to
+    `on_result` as soon as it is final, so nothing accumulates regardless of
+    range size. `resolve` picks a resolver from RESOLVERS: "head" only follows
+    the redirect chain, "get" downloads the final page like the old scraper.
+    """
+    controller = controller or AimdController()
+    url_iter = iter(urls)
+    if resolve == "head":
+        hosts_rejecting_head = set()
+        check = lambda session, url: resolve_redirect(session, url, timeout_seconds, hosts_rejecting_head)
+    else:
+        check = lambda session, url: RESOLVERS[resolve](session, url, timeout_seconds)
+
+    async with make_session(controller.maximum) as session:
+        async def worker():
+            # Workers share one iterator; the event loop is single-threaded so each URL is taken once
+            for url in url_iter:
+                result = await call_with_retries(controller, lambda: check(session, url), max_attempts=max_attempts)
+                registry.observe("resolve", result.get('elapsed', 0.0), error=result_error(result), bytes=result.get('bytes', 0))
+                on_result(result)
+
+        # One worker per possible slot; the controller decides how many actually run
+        await asyncio.gather(*(worker() for _ in range(controller.maximum)))
+
+
+def discover(urls, on_result, controller=None, timeout_seconds=10, resolve="head", max_attempts=5):
+    asyncio.run(discover_async(urls, on_result, controller=controller, timeout_seconds=timeout_seconds,
+                               resolve=resolve, max_attempts=max_attempts))
+
+
+class TransferStats:
+    """Running bytes / wall-time totals so resolver modes can be compared per ID."""
+
+    def __init__(self):
+        self.ids = 0
+        self.bytes = 0
+        self.elapsed = 0.0
+
+    def add(self, result):
+        self.ids += 1
+        self.bytes += result.get('bytes', 0)
+        self.elapsed += result.get('elapsed', 0.0)
+
+    def summary(self):
+        if not self.ids:
+            return "No IDs checked"
+        return (
+            f"{self.bytes / 1_000_000:.2f} MB transferred | "
+            f"{self.bytes / self.ids:.0f} bytes/ID | "
+            f"{self.elapsed / self.ids * 1000:.1f} ms/ID"
+        )
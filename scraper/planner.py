@@ -0,0 +1,171 @@
+import re
+from collections import Counter
+
+from scraper.concurrency import classify
+from scraper.crawl_state import NOT_FOUND, discussion_id
+
+VENDOR_PATTERN = re.compile(r'/discussions/([a-z0-9-]+)/view/\d+-')
+DEFAULT_STRIDE = 50
+
+
+def extract_vendor(url):
+    """
+    Vendor segment of a discussion URL. ExamTopics redirects '<id>-ponce'
+    under any vendor to the discussion's real vendor, so the final URL says
+    which vendor an ID belongs to.
+    """
+    match = VENDOR_PATTERN.search(url or "")
+    return match.group(1) if match else None
+
+
+class IdSpacePlanner:
+    """
+    Chooses which discussion IDs in [start, end] to probe instead of brute-forcing the whole range.
+
+    1. Sparse: every `stride`-th ID, to learn which vendor/exam each region
+       of the ID space belongs to.
+    2. Dense: every ID within `radius` of a hit for one of `target_vendors`,
+       repeated around each new hit until a target cluster is closed off by
+       `radius` IDs that are not the target's.
+    3. Above the maximum: every ID above the highest ID known to resolve,
+       since new discussions are added at the top of the ID space.
+
+    A target cluster with no sampled ID in it (shorter than `stride`, or
+    isolated strays) is missed; report() against a full scan shows how
+    many. Feed it results with observe(); run() drives the rounds.
+    """
+
+    def __init__(self, start, end, target_vendors=("databricks",), stride=DEFAULT_STRIDE, radius=None, known_max=0):
+        self.start = start
+        self.end = end
+        self.target_vendors = set(target_vendors)
+        self.stride = stride
+        self.radius = radius or stride
+        self.known_max = known_max
+        # id → (vendor, exam) for IDs that resolved, None for 404s; failed probes are left out
+        self.outcomes = {}
+        # Every ID with a known outcome or in flight; `probed` is just this run's requests
+        self.requested = set()
+        self.probed = set()
+        self.seeded = 0
+        self.sampled = False
+        self.rounds = []
+
+    # ---- Observations ----
+    def observe(self, result, exam=None):
+        """Record one resolver result; `exam` is extract_exam_name() of its final URL."""
+        discussion = discussion_id(result['original_url'])
+        if discussion is None:
+            return
+        if result['is_valid'] and result.get('final_url'):
+            self.outcomes[discussion] = (extract_vendor(result['final_url']), exam)
+            self.known_max = max(self.known_max, discussion)
+        elif classify(result) == "permanent":
+            self.outcomes[discussion] = None
+
+    def seed(self, outcomes):
+        """Take (id, status, final_url, exam) rows from CrawlState.settled_outcomes() as already probed."""
+        for discussion, status, final_url, exam in outcomes:
+            self.requested.add(discussion)
+            self.seeded += 1
+            if status == NOT_FOUND:
+                self.outcomes[discussion] = None
+            else:
+                self.outcomes[discussion] = (extract_vendor(final_url), exam)
+                self.known_max = max(self.known_max, discussion)
+
+    def is_target(self, discussion):
+        outcome = self.outcomes.get(discussion)
+        return outcome is not None and outcome[0] in self.target_vendors
+
+    # ---- Planning ----
+    def next_ids(self):
+        """IDs for the next round, or an empty list once the plan is complete."""
+        if not self.sampled:
+            self.sampled = True
+            samples = set(range(self.start, self.end + 1, self.stride)) | {self.end}
+            ids = sorted(samples - self.requested)
+            if ids:
+                self.rounds.append(("sparse", len(ids)))
+                return ids
+            # Every sample is already known (seeded from the crawl state): go straight to the dense rounds
+
+        ids = set()
+        for hit in self.target_hits():
+            ids.update(range(max(self.start, hit - self.radius), min(self.end, hit + self.radius) + 1))
+        ids -= self.requested
+        # New discussions appear at the top, so earlier 404s up there are probed again
+        ids.update(set(range(max(self.start, self.known_max + 1), self.end + 1)) - self.probed)
+        ids = sorted(ids)
+        if ids:
+            self.rounds.append(("dense", len(ids)))
+        return ids
+
+    def run(self, probe):
+        """Call probe(ids) round by round, each of whose results must reach observe(), until nothing is left to probe."""
+        while True:
+            ids = self.next_ids()
+            if not ids:
+                return self.report()
+            self.requested.update(ids)
+            self.probed.update(ids)
+            probe(ids)
+
+    # ---- Results ----
+    def target_hits(self):
+        return sorted(discussion for discussion in self.outcomes if self.is_target(discussion))
+
+    def regions(self):
+        """Runs of consecutive resolved IDs with the same vendor: [(first_id, last_id, vendor, exam counts)]."""
+        regions = []
+        for discussion in sorted(d for d, outcome in self.outcomes.items() if outcome):
+            vendor, exam = self.outcomes[discussion]
+            if regions and regions[-1][2] == vendor:
+                regions[-1][1] = discussion
+                regions[-1][3][exam] += 1
+            else:
+                regions.append([discussion, discussion, vendor, Counter({exam: 1})])
+        return [tuple(region) for region in regions]
+
+    def report(self, full_scan_hits=None):
+        """
+        Probe counts and target hits, plus, given the target IDs a full scan
+        found, recall against it and the IDs the plan missed.
+        """
+        size = self.end - self.start + 1
+        hits = self.target_hits()
+        report = {
+            "range": (self.start, self.end),
+            "probed": len(self.probed),
+            "seeded": self.seeded,
+            "probe_fraction": len(self.probed) / size,
+            "rounds": list(self.rounds),
+            "target_hits": len(hits),
+            "known_max": self.known_max,
+            "regions": len(self.regions()),
+        }
+        if full_scan_hits is not None:
+            expected = set(full_scan_hits) & set(range(self.start, self.end + 1))
+            found = expected & set(hits)
+            report.update(full_scan_hits=len(expected), recall=len(found) / len(expected) if expected else 1.0,
+                          missed=sorted(expected - found))
+        return report
+
+
+def describe(report):
+    text = (f"IDs {report['range'][0]}-{report['range'][1]}: probed {report['probed']} "
+            f"({report['probe_fraction']:.1%} of a full scan"
+            + (f", {report['seeded']} known from crawl state" if report['seeded'] else "")
+            + f") in {len(report['rounds'])} rounds | {report['target_hits']} target hits | "
+            f"{report['regions']} vendor regions | max known ID {report['known_max']}")
+    if "recall" in report:
+        text += (f"\nCoverage vs full scan: {report['recall']:.1%} of {report['full_scan_hits']} target IDs"
+                 + (f" | missed: {report['missed'][:20]}{' ...' if len(report['missed']) > 20 else ''}"
+                    if report['missed'] else ""))
+    return text
+
+
+def target_hits_from_state(state, start, end, target_vendors):
+    """Target-vendor IDs that a (full-scan) crawl state resolved, for report(full_scan_hits=...)."""
+    return [discussion for discussion, status, final_url, exam in state.settled_outcomes(start, end)
+            if status != NOT_FOUND and extract_vendor(final_url) in target_vendors]
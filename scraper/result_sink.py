@@ -0,0 +1,193 @@
+import json
+import os
+import time
+
+FAILURE_SEPARATOR = "—"
+
+
+def normalize_url(line):
+    """Extract URL from strings like '<url> — reason' or keep line if clean."""
+    if FAILURE_SEPARATOR in line:
+        return line.split(FAILURE_SEPARATOR)[0].strip()
+    return line.strip()
+
+
+def _failure_reason(line):
+    if FAILURE_SEPARATOR in line:
+        return line.split(FAILURE_SEPARATOR, 1)[1].strip() or None
+    return None
+
+
+def _read_json_list(filepath):
+    if not os.path.exists(filepath):
+        return []
+    with open(filepath, "r") as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError:
+            return []
+
+
+def _write_json_atomic(filepath, items):
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(items, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
+
+
+class ResultSink:
+    """
+    Collects scraper results without rewriting JSON files per result.
+
+    Every new valid URL or failure is appended as one line to an append-only
+    JSONL segment and kept in memory. The sorted `jsons/<exam>.json` and
+    `jsonsinvalid/failures.json` files are only rewritten on `compact()`,
+    which runs every `compact_every` records, every `compact_interval`
+    seconds and on `close()`. Segments left behind by a crash are replayed
+    on start-up, so nothing written to them is lost.
+    """
+
+    def __init__(self, jsons_dir="jsons", invalid_dir="jsonsinvalid", compact_every=5000, compact_interval=60):
+        self.jsons_dir = jsons_dir
+        self.invalid_dir = invalid_dir
+        self.compact_every = compact_every
+        self.compact_interval = compact_interval
+        os.makedirs(jsons_dir, exist_ok=True)
+        os.makedirs(invalid_dir, exist_ok=True)
+
+        self.valid_segment_path = os.path.join(jsons_dir, "segment.jsonl")
+        self.failures_segment_path = os.path.join(invalid_dir, "failures.jsonl")
+        self.failures_path = os.path.join(invalid_dir, "failures.json")
+
+        self._exams = {}
+        self._dirty_exams = set()
+        self._failures = None
+        self._failures_dirty = False
+        self._pending = 0
+        self._last_compact = time.monotonic()
+
+        self._replay()
+        self._valid_segment = open(self.valid_segment_path, "a")
+        self._failures_segment = open(self.failures_segment_path, "a")
+
+    # ---- In-memory views ----
+    def exam_urls(self, exam):
+        if exam not in self._exams:
+            self._exams[exam] = set(_read_json_list(self._exam_path(exam)))
+        return self._exams[exam]
+
+    def failures(self):
+        """Current failures as {url: reason}."""
+        if self._failures is None:
+            self._failures = {}
+            for line in _read_json_list(self.failures_path):
+                if isinstance(line, str) and line.startswith("http"):
+                    self._failures[normalize_url(line)] = _failure_reason(line)
+        return self._failures
+
+    # ---- Recording ----
+    def add_valid(self, exam, url):
+        """Record a resolved URL for `exam`. Returns False if it was already known."""
+        urls = self.exam_urls(exam)
+        if url in urls:
+            return False
+        urls.add(url)
+        self._dirty_exams.add(exam)
+        self._append(self._valid_segment, {"exam": exam, "url": url})
+        return True
+
+    def add_failure(self, url, reason=None):
+        failures = self.failures()
+        if url in failures and failures[url] == reason:
+            return
+        failures[url] = reason
+        self._failures_dirty = True
+        self._append(self._failures_segment, {"op": "fail", "url": url, "reason": reason})
+
+    def resolve_failure(self, url):
+        failures = self.failures()
+        if url not in failures:
+            return
+        del failures[url]
+        self._failures_dirty = True
+        self._append(self._failures_segment, {"op": "resolve", "url": url})
+
+    def _append(self, segment, record):
+        segment.write(json.dumps(record) + "\n")
+        segment.flush()
+        self._pending += 1
+        if self._pending >= self.compact_every or time.monotonic() - self._last_compact >= self.compact_interval:
+            self.compact()
+
+    # ---- Compaction ----
+    def compact(self):
+        """Rewrite the sorted JSON files for everything that changed, then truncate the segments."""
+        for exam in sorted(self._dirty_exams):
+            _write_json_atomic(self._exam_path(exam), sorted(self._exams[exam]))
+        self._dirty_exams.clear()
+
+        if self._failures_dirty:
+            entries = [f"{url} {FAILURE_SEPARATOR} {reason}" if reason else url for url, reason in self._failures.items()]
+            _write_json_atomic(self.failures_path, sorted(entries))
+            self._failures_dirty = False
+
+        for segment in (self._valid_segment, self._failures_segment):
+            segment.seek(0)
+            segment.truncate()
+        self._pending = 0
+        self._last_compact = time.monotonic()
+
+    def close(self):
+        self.compact()
+        self._valid_segment.close()
+        self._failures_segment.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ---- Internals ----
+    def _exam_path(self, exam):
+        return os.path.join(self.jsons_dir, f"{exam}.json")
+
+    def _replay(self):
+        replayed = False
+        for record in self._read_segment(self.valid_segment_path):
+            urls = self.exam_urls(record["exam"])
+            if record["url"] not in urls:
+                urls.add(record["url"])
+                self._dirty_exams.add(record["exam"])
+            replayed = True
+
+        for record in self._read_segment(self.failures_segment_path):
+            failures = self.failures()
+            if record["op"] == "fail":
+                failures[record["url"]] = record.get("reason")
+            else:
+                failures.pop(record["url"], None)
+            self._failures_dirty = True
+            replayed = True
+
+        if replayed:
+            print("♻️ Replaying result segments left by a previous run")
+            self._valid_segment = open(self.valid_segment_path, "a")
+            self._failures_segment = open(self.failures_segment_path, "a")
+            self.compact()
+            self._valid_segment.close()
+            self._failures_segment.close()
+
+    @staticmethod
+    def _read_segment(path):
+        if not os.path.exists(path):
+            return
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line from a crash mid-write
+                    continue